@@ -0,0 +1,318 @@
+"""Benchmarks of the WalkingPad status pipeline and command round-trips.
+
+The status pipeline benchmark feeds status frames to the controller notification
+handler at several rates. Each frame goes through WalkingPad._on_status_update,
+WalkingPadCoordinator._async_handle_update and a listener evaluating the state of
+every entity, like a state write would.
+
+The command benchmark measures the round-trip of each command sent to an emulated
+WalkingPad, until the WalkingPad reports its effect.
+
+Run with scripts/benchmark in the development environment.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from functools import partial
+
+from bleak.backends.device import BLEDevice
+from emulator import WalkingPadEmulator
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import frame
+
+from king_smith.const import BeltState, WalkingPadMode
+from king_smith.controller import NOTIFY_CHARACTERISTIC_UUID
+from king_smith.coordinator import WalkingPadCoordinator
+from king_smith.number import WalkingPadSpeedNumberEntity
+from king_smith.scheduler import DEFAULT_COMMAND_SPACING_SECONDS
+from king_smith.sensor import (
+    DIAGNOSTIC_SENSORS,
+    SENSORS,
+    WalkingPadDiagnosticSensor,
+    WalkingPadSensor,
+)
+from king_smith.switch import WalkingPadBeltSwitchAuto, WalkingPadBeltSwitchManual
+from king_smith.walkingpad import WalkingPad
+
+NOTIFICATION_RATES = (1, 10, 100)
+DEVICE_ADDRESS = "00:00:00:00:00:00"
+
+# Frames traced to measure the allocations, tracing slows down the pipeline.
+ALLOCATION_FRAMES = 200
+
+
+def _percentile(values: list[float], percentile: int) -> float:
+    """Return the given percentile of the values."""
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[percentile - 1]
+
+
+class StatusPipeline:
+    """A WalkingPad, its coordinator and its entities, fed with emulated frames."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Create the pipeline."""
+        self.emulator: WalkingPadEmulator | None = None
+        self.device = WalkingPad(
+            "WalkingPad benchmark",
+            BLEDevice(DEVICE_ADDRESS, "WalkingPad benchmark", None),
+            controller_factory=self._create_emulator,
+        )
+        self.coordinator = WalkingPadCoordinator(hass, self.device)
+        self.sensors = [
+            WalkingPadSensor(self.coordinator, description) for description in SENSORS
+        ]
+        self.diagnostic_sensors = [
+            WalkingPadDiagnosticSensor(self.coordinator, description)
+            for description in DIAGNOSTIC_SENSORS
+        ]
+        self.number = WalkingPadSpeedNumberEntity(self.coordinator)
+        self.switches = [
+            WalkingPadBeltSwitchManual(self.coordinator),
+            WalkingPadBeltSwitchAuto(self.coordinator),
+        ]
+        self.updates = 0
+
+    def _create_emulator(self, *args) -> WalkingPadEmulator:
+        self.emulator = WalkingPadEmulator(*args)
+        return self.emulator
+
+    def _evaluate_entities(self) -> None:
+        """Evaluate the state of every entity."""
+        for sensor in self.sensors:
+            _ = sensor.available, sensor.native_value
+        for sensor in self.diagnostic_sensors:
+            _ = sensor.available, sensor.native_value
+        _ = self.number.available, self.number.native_value
+        for switch in self.switches:
+            _ = switch.is_on
+        self.updates += 1
+
+    async def start(self) -> None:
+        """Connect the emulated WalkingPad and start the belt."""
+        self.coordinator.async_add_listener(self._evaluate_entities)
+        await self.device.connect()
+        assert self.emulator is not None
+        self.emulator.mode = WalkingPadMode.MANUAL
+        self.emulator.belt_state = BeltState.ACTIVE
+        self.emulator.speed = self.emulator.target_speed = 4.0
+
+    def feed(self, notification: bytes | None = None) -> int:
+        """Send a notification through the pipeline, return its handling time in ns.
+
+        The notification is a status frame of the emulator by default.
+        """
+        assert self.emulator is not None
+        if notification is None:
+            notification = self.emulator.status_frame()
+        start = time.perf_counter_ns()
+        self.emulator.notif_handler(NOTIFY_CHARACTERISTIC_UUID, notification)
+        return time.perf_counter_ns() - start
+
+    async def stop(self) -> None:
+        """Disconnect the emulated WalkingPad."""
+        await self.device.disconnect()
+        self.device.shutdown()
+
+
+async def _benchmark_rate(pipeline: StatusPipeline, rate: int, duration: float):
+    """Feed frames at the given rate and return the timing statistics."""
+    loop = asyncio.get_running_loop()
+    period = 1 / rate
+    frames = max(1, int(duration * rate))
+    handling_times: list[int] = []
+    lags: list[float] = []
+    done = loop.create_future()
+    start = loop.time()
+
+    def feed(due: float, index: int) -> None:
+        lags.append(loop.time() - due)
+        handling_times.append(pipeline.feed())
+        if index + 1 == frames:
+            done.set_result(None)
+            return
+        next_due = start + (index + 1) * period
+        loop.call_at(next_due, feed, next_due, index + 1)
+
+    cpu_start = time.process_time()
+    updates_start = pipeline.updates
+    loop.call_at(start, feed, start, 0)
+    await done
+    wall_time = loop.time() - start
+    cpu_time = time.process_time() - cpu_start
+
+    handling_us = [value / 1000 for value in handling_times]
+    return {
+        "frames": frames,
+        "updates": pipeline.updates - updates_start,
+        "p50": _percentile(handling_us, 50),
+        "p95": _percentile(handling_us, 95),
+        "p99": _percentile(handling_us, 99),
+        "lag": _percentile(lags, 95) * 1000,
+        "cpu": 100 * cpu_time / wall_time if wall_time else 0.0,
+    }
+
+
+def _benchmark_allocations(pipeline: StatusPipeline) -> tuple[float, float]:
+    """Return the mean allocated bytes per frame and the retained bytes per frame."""
+    allocated = 0
+    tracemalloc.start()
+    try:
+        retained_start = tracemalloc.get_traced_memory()[0]
+        for _ in range(ALLOCATION_FRAMES):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            pipeline.feed()
+            allocated += tracemalloc.get_traced_memory()[1] - before
+        retained = tracemalloc.get_traced_memory()[0] - retained_start
+    finally:
+        tracemalloc.stop()
+    return allocated / ALLOCATION_FRAMES, retained / ALLOCATION_FRAMES
+
+
+async def benchmark_status_pipeline(hass: HomeAssistant, duration: float) -> None:
+    """Benchmark the status pipeline at each notification rate."""
+    pipeline = StatusPipeline(hass)
+    await pipeline.start()
+    print("Status pipeline (handling time per frame, in µs)")
+    print(
+        f"{'rate':>6} {'frames':>7} {'updates':>7} {'p50':>8} {'p95':>8} {'p99':>8}"
+        f" {'lag p95 ms':>10} {'cpu %':>6} {'alloc B':>8} {'kept B':>7}"
+    )
+    try:
+        for rate in NOTIFICATION_RATES:
+            stats = await _benchmark_rate(pipeline, rate, duration)
+            allocated, retained = _benchmark_allocations(pipeline)
+            print(
+                f"{rate:>4}Hz {stats['frames']:>7} {stats['updates']:>7}"
+                f" {stats['p50']:>8.1f} {stats['p95']:>8.1f} {stats['p99']:>8.1f}"
+                f" {stats['lag']:>10.2f} {stats['cpu']:>6.1f}"
+                f" {allocated:>8.0f} {retained:>7.0f}"
+            )
+    finally:
+        await pipeline.stop()
+
+
+async def measure_commands(
+    iterations: int, latency: float, command_spacing: float
+) -> dict[str, list[float]]:
+    """Return the round-trips of each command to an emulated WalkingPad, in ms."""
+    device = WalkingPad(
+        "WalkingPad benchmark",
+        BLEDevice(DEVICE_ADDRESS, "WalkingPad benchmark", None),
+        command_spacing=command_spacing,
+        controller_factory=partial(
+            WalkingPadEmulator,
+            latency=latency,
+            start_delay=0,
+            # The speed is reached at once, to measure the link and not the belt.
+            acceleration=1000,
+        ),
+    )
+    statuses: list[asyncio.Future] = []
+
+    def on_status(_) -> None:
+        for future in statuses:
+            if not future.done():
+                future.set_result(None)
+        statuses.clear()
+
+    async def connect() -> bool:
+        await device.connect()
+        return device.connected
+
+    async def ask_stats() -> bool:
+        future = asyncio.get_running_loop().create_future()
+        statuses.append(future)
+        await device.update_state()
+        await future
+        return True
+
+    device.register_status_callback(on_status)
+    round_trips: dict[str, list[float]] = {}
+
+    async def measure(name: str, command: Callable[[], Awaitable[bool]]) -> None:
+        start = time.perf_counter()
+        if not await command():
+            print(f"{name} was not acknowledged")
+            return
+        round_trips.setdefault(name, []).append(1000 * (time.perf_counter() - start))
+
+    try:
+        await measure("connect", connect)
+        await device.switch_mode(WalkingPadMode.MANUAL)
+        for iteration in range(iterations):
+            await measure("ask_stats", ask_stats)
+            await measure("start_belt", device.start_belt)
+            await measure("set_speed", partial(device.set_speed, 2.5 + iteration % 3))
+            await measure("stop_belt", device.stop_belt)
+    finally:
+        await device.disconnect()
+        device.shutdown()
+    return round_trips
+
+
+async def benchmark_commands(
+    iterations: int, latency: float, command_spacing: float
+) -> None:
+    """Benchmark the command round-trips against an emulated WalkingPad."""
+    round_trips = await measure_commands(iterations, latency, command_spacing)
+    print(
+        f"Command round-trips (in ms, latency {latency * 1000:.0f}ms,"
+        f" spacing {command_spacing * 1000:.0f}ms)"
+    )
+    print(f"{'command':>10} {'count':>6} {'p50':>8} {'p95':>8} {'max':>8}")
+    for name, values in round_trips.items():
+        print(
+            f"{name:>10} {len(values):>6} {_percentile(values, 50):>8.1f}"
+            f" {_percentile(values, 95):>8.1f} {max(values):>8.1f}"
+        )
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Run the benchmarks."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        frame.async_setup(hass)
+        try:
+            await benchmark_status_pipeline(hass, args.duration)
+            print()
+            await benchmark_commands(
+                args.iterations, args.latency, args.command_spacing
+            )
+        finally:
+            await hass.async_stop(force=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=10,
+        help="duration of each status pipeline run, in seconds",
+    )
+    parser.add_argument(
+        "--iterations", type=int, default=10, help="round-trips of each command"
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.02,
+        help="emulated bluetooth latency, in seconds",
+    )
+    parser.add_argument(
+        "--command-spacing",
+        type=float,
+        default=DEFAULT_COMMAND_SPACING_SECONDS,
+        help="minimal delay between two commands, in seconds",
+    )
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,272 @@
+"""WalkingPad emulator, a hardware-free stand-in for the bluetooth controller.
+
+Used by the benchmarks, it is not shipped with the integration.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import random
+import time
+from collections.abc import Callable
+
+from bleak import BleakError
+from bleak.backends.device import BLEDevice
+from ph4_walkingpad.pad import WalkingPad as WalkingPadProtocol
+
+from king_smith.const import BeltState, WalkingPadMode
+from king_smith.controller import NOTIFY_CHARACTERISTIC_UUID, WalkingPadController
+
+_LOGGER = logging.getLogger(__name__)
+
+# Command codes, third byte of the frames written by the controller.
+COMMAND_ASK_STATS = 0
+COMMAND_CHANGE_SPEED = 1
+COMMAND_SWITCH_MODE = 2
+COMMAND_START_BELT = 4
+
+# Belt physics of a WalkingPad A1 with its default preferences.
+EMULATOR_START_DELAY_SECONDS = 3.0
+EMULATOR_START_SPEED = 2.0  # in km/h
+EMULATOR_ACCELERATION = 1.0  # in km/h per second
+EMULATOR_STRIDE_LENGTH = 0.65  # in meters
+EMULATOR_MIN_SPEED = 0.5  # in km/h
+EMULATOR_MAX_SPEED = 6.0  # in km/h
+
+# Largest value of the 3 bytes counters of the status frames.
+_MAX_COUNTER = 0xFFFFFF
+
+
+class WalkingPadEmulator(WalkingPadController):
+    """An emulated WalkingPad, driven through the ph4_walkingpad controller API.
+
+    Commands are decoded from the frames the controller writes, and the status is
+    reported as status frames going through the notification handler of the
+    bluetooth controller, like the real device does.
+    The belt starts after a delay, ramps its speed up and down and accumulates the
+    session distance, steps and time.
+    Latency, dropped notifications and disconnections can be injected.
+    """
+
+    def __init__(
+        self,
+        name: str = "WalkingPad emulator",
+        ble_device_callback: Callable[[], BLEDevice] | None = None,
+        disconnected_callback: Callable[[], None] | None = None,
+        *,
+        notification_rate: float = 0,
+        latency: float = 0,
+        latency_jitter: float = 0,
+        drop_rate: float = 0,
+        disconnect_rate: float = 0,
+        start_delay: float = EMULATOR_START_DELAY_SECONDS,
+        start_speed: float = EMULATOR_START_SPEED,
+        acceleration: float = EMULATOR_ACCELERATION,
+        seed: int | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Create an emulated WalkingPad.
+
+        The status is sent in reply to ask_stats, and in addition notification_rate
+        times per second while connected if it is not 0.
+        The latency, in seconds, delays each command and each notification.
+        The drop and disconnect rates are the probabilities for a notification to
+        be lost and for a command to break the link.
+        """
+        super().__init__(name, ble_device_callback, disconnected_callback)
+        self.notification_rate = notification_rate
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.drop_rate = drop_rate
+        self.disconnect_rate = disconnect_rate
+        self.start_delay = start_delay
+        self.start_speed = start_speed
+        self.acceleration = acceleration
+        self._random = random.Random(seed)
+        self._clock = clock
+        self._notifier: asyncio.Task | None = None
+        self.connected = False
+
+        self.belt_state = BeltState.STANDBY
+        self.mode = WalkingPadMode.STANDBY
+        self.speed = 0.0
+        self.target_speed = 0.0
+        self.distance = 0.0  # in meters
+        self.running_time = 0.0  # in seconds
+        self.steps = 0.0
+        self._active_at = 0.0
+        self._last_advance = clock()
+
+        self.connections = 0
+        self.disconnections = 0
+        self.received_commands = 0
+        self.sent_notifications = 0
+        self.dropped_notifications = 0
+
+    def _delay(self) -> float:
+        return self.latency + self._random.uniform(0, self.latency_jitter)
+
+    async def run(self, address=None) -> None:
+        """Connect the emulated device and start the periodic notifications."""
+        await asyncio.sleep(self._delay())
+        self._advance()
+        self.connected = True
+        self.connections += 1
+        if self.notification_rate > 0:
+            self._notifier = asyncio.get_running_loop().create_task(
+                self._notify_periodically(), name="WalkingPad emulator notifications"
+            )
+
+    async def disconnect(self) -> None:
+        """Disconnect the emulated device."""
+        self._stop_notifier()
+        self.connected = False
+
+    def simulate_disconnect(self) -> None:
+        """Break the link, as if the device went out of range."""
+        if not self.connected:
+            return
+        _LOGGER.debug("Emulated WalkingPad disconnected")
+        self._stop_notifier()
+        self.connected = False
+        self.disconnections += 1
+        if self._disconnected_callback is not None:
+            self._disconnected_callback()
+
+    def _stop_notifier(self) -> None:
+        if self._notifier is not None:
+            self._notifier.cancel()
+            self._notifier = None
+
+    async def _notify_periodically(self) -> None:
+        with contextlib.suppress(asyncio.CancelledError):
+            while True:
+                await asyncio.sleep(1 / self.notification_rate)
+                self._notify_status()
+
+    async def send_cmd_raw(self, cmd) -> None:
+        """Receive a command frame written by the controller."""
+        if not self.connected:
+            raise BleakError("Emulated WalkingPad is not connected")
+        self.last_raw_cmd = cmd
+        self.last_cmd_time = time.time()
+        await asyncio.sleep(self._delay())
+        if not self.connected:
+            raise BleakError("Emulated WalkingPad disconnected")
+        if self._random.random() < self.disconnect_rate:
+            self.simulate_disconnect()
+            raise BleakError("Emulated WalkingPad disconnected")
+
+        self.received_commands += 1
+        self._advance()
+        code, value = cmd[2], cmd[3]
+        if code == COMMAND_ASK_STATS:
+            asyncio.get_running_loop().call_later(self._delay(), self._notify_status)
+        elif code == COMMAND_CHANGE_SPEED:
+            self._change_speed(value / 10)
+        elif code == COMMAND_SWITCH_MODE:
+            self._switch_mode(value)
+        elif code == COMMAND_START_BELT:
+            self._start_belt()
+        else:
+            _LOGGER.debug("Emulated WalkingPad ignored command %s", cmd.hex())
+
+    def _start_belt(self) -> None:
+        if self.mode != WalkingPadMode.MANUAL or self.belt_state not in (
+            BeltState.STOPPED,
+            BeltState.STANDBY,
+        ):
+            return
+        if self.belt_state == BeltState.STANDBY:
+            # A new session starts.
+            self.distance = self.running_time = self.steps = 0.0
+        self.belt_state = BeltState.STARTING
+        self.target_speed = self.start_speed
+        self._active_at = self._last_advance + self.start_delay
+
+    def _change_speed(self, speed: float) -> None:
+        if speed == 0:
+            # The controller stops the belt with a null speed.
+            if self.belt_state == BeltState.STARTING:
+                self.belt_state = BeltState.STOPPED
+            self.target_speed = 0.0
+        elif self.belt_state in (BeltState.STARTING, BeltState.ACTIVE):
+            self.target_speed = min(max(speed, EMULATOR_MIN_SPEED), EMULATOR_MAX_SPEED)
+
+    def _switch_mode(self, value: int) -> None:
+        try:
+            mode = WalkingPadMode(value)
+        except ValueError:
+            _LOGGER.debug("Emulated WalkingPad ignored unknown mode %s", value)
+            return
+        self.mode = mode
+        self.speed = self.target_speed = 0.0
+        if mode == WalkingPadMode.STANDBY:
+            self.belt_state = BeltState.STANDBY
+        elif self.belt_state != BeltState.STANDBY:
+            self.belt_state = BeltState.STOPPED
+
+    def _advance(self) -> None:
+        """Move the belt up to the current time."""
+        now = self._clock()
+        if self.belt_state == BeltState.STARTING:
+            if now < self._active_at:
+                self._last_advance = now
+                return
+            self.belt_state = BeltState.ACTIVE
+            self._last_advance = self._active_at
+
+        elapsed = now - self._last_advance
+        self._last_advance = now
+        if self.belt_state != BeltState.ACTIVE or elapsed <= 0:
+            return
+
+        step = self.acceleration * elapsed
+        speed = self.speed
+        if speed < self.target_speed:
+            speed = min(speed + step, self.target_speed)
+        else:
+            speed = max(speed - step, self.target_speed)
+        distance = (self.speed + speed) / 2 / 3.6 * elapsed
+        self.speed = speed
+        self.distance += distance
+        self.steps += distance / EMULATOR_STRIDE_LENGTH
+        self.running_time += elapsed
+        if speed == 0:
+            self.belt_state = BeltState.STOPPED
+
+    def status_frame(self) -> bytearray:
+        """Build a status frame from the current state of the belt."""
+        self._advance()
+        frame = bytearray(
+            [
+                248,
+                162,
+                self.belt_state.value,
+                round(self.speed * 10),
+                self.mode.value,
+                *WalkingPadProtocol.int2byte(min(int(self.running_time), _MAX_COUNTER)),
+                *WalkingPadProtocol.int2byte(
+                    min(int(self.distance / 10), _MAX_COUNTER)
+                ),
+                *WalkingPadProtocol.int2byte(min(int(self.steps), _MAX_COUNTER)),
+                0,
+                0,
+                0,
+                0,
+                0,
+                253,
+            ]
+        )
+        return WalkingPadProtocol.fix_crc(frame)
+
+    def _notify_status(self) -> None:
+        if not self.connected:
+            return
+        if self._random.random() < self.drop_rate:
+            self.dropped_notifications += 1
+            return
+        self.sent_notifications += 1
+        self.notif_handler(NOTIFY_CHARACTERISTIC_UUID, self.status_frame())
@@ -0,0 +1,96 @@
+"""Replay of a WalkingPad capture through the status pipeline.
+
+The notifications of a capture recorded by the king_smith.capture service are fed
+to the controller notification handler, spaced like in the capture or faster.
+They go through WalkingPad._on_status_update, the coordinator and the entities
+like in Home Assistant, which makes real workouts and failure cases reproducible.
+
+Run with scripts/replay in the development environment.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmark import StatusPipeline, _percentile
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import frame
+
+from king_smith.capture import CaptureDirection, async_replay, read_capture
+
+
+async def replay(hass: HomeAssistant, path: Path, speed: float | None) -> None:
+    """Replay a capture and report how the pipeline handled it."""
+    records = read_capture(path)
+    commands = sum(record.direction is CaptureDirection.COMMAND for record in records)
+    pipeline = StatusPipeline(hass)
+    await pipeline.start()
+    assert pipeline.emulator is not None
+    # Only the captured notifications go through the pipeline.
+    pipeline.emulator.drop_rate = 1
+
+    handling_times: list[int] = []
+    updates_start = pipeline.updates
+    start = time.perf_counter()
+    try:
+        notifications = await async_replay(
+            records,
+            lambda notification: handling_times.append(pipeline.feed(notification)),
+            speed,
+        )
+    finally:
+        await pipeline.stop()
+    wall_time = time.perf_counter() - start
+
+    sequencer = pipeline.coordinator.status_sequencer
+    handling_us = [value / 1000 for value in handling_times]
+    print(f"Replay of {path}")
+    print(
+        f"{notifications} notifications and {commands} commands captured over"
+        f" {records[-1].timestamp if records else 0:.1f}s, replayed in {wall_time:.1f}s"
+    )
+    print(
+        f"frames accepted {sequencer.accepted_frames},"
+        f" duplicate {sequencer.duplicate_frames},"
+        f" out of order {sequencer.out_of_order_frames},"
+        f" clock resets {sequencer.clock_resets}"
+    )
+    print(f"entity updates {pipeline.updates - updates_start}")
+    if handling_us:
+        print(
+            f"handling time per notification (µs): p50 {_percentile(handling_us, 50):.1f}"
+            f" p95 {_percentile(handling_us, 95):.1f}"
+            f" p99 {_percentile(handling_us, 99):.1f} max {max(handling_us):.1f}"
+        )
+    print(f"final status {pipeline.coordinator.status}")
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Replay the capture."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        frame.async_setup(hass)
+        try:
+            await replay(hass, args.capture, args.speed or None)
+        finally:
+            await hass.async_stop(force=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("capture", type=Path, help="capture file to replay")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1,
+        help="replay speed factor, 0 to replay without waiting",
+    )
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except ValueError as err:
+        sys.exit(f"Unable to replay: {err}")
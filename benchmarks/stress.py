@@ -0,0 +1,311 @@
+"""Stress test of concurrent control calls against an emulated WalkingPad.
+
+Hundreds of belt switch turn on and off, speed number changes and coordinator
+refreshes are fired with random overlaps, like several automations driving the
+same WalkingPad. The run fails if two commands reach the WalkingPad at the same
+time or closer than the command spacing, if the final state does not match the
+last requests, or if the throughput or the tail latency are out of their limits.
+
+Run with scripts/stress in the development environment.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from functools import partial
+
+from benchmark import DEVICE_ADDRESS, _percentile
+from bleak.backends.device import BLEDevice
+from emulator import WalkingPadEmulator
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import frame
+
+from king_smith.const import BeltState, WalkingPadMode
+from king_smith.coordinator import WalkingPadCoordinator
+from king_smith.number import WalkingPadSpeedNumberEntity
+from king_smith.switch import WalkingPadBeltSwitchManual
+from king_smith.walkingpad import WalkingPad
+
+SPEEDS = tuple(value / 10 for value in range(10, 61, 5))
+
+# Tolerance on the command spacing, for the timer resolution.
+SPACING_TOLERANCE_SECONDS = 0.002
+
+# Time given to the last commands to be acknowledged before checking the state.
+SETTLE_TIMEOUT_SECONDS = 10
+
+
+class MonitoredEmulator(WalkingPadEmulator):
+    """An emulated WalkingPad recording how the commands reach it."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        """Create the emulator."""
+        super().__init__(*args, **kwargs)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.min_gap: float | None = None
+        self._last_command_end: float | None = None
+
+    async def send_cmd_raw(self, cmd) -> None:
+        """Receive a command, tracking the overlaps and the spacing."""
+        start = time.monotonic()
+        if self._last_command_end is not None and not self.in_flight:
+            gap = start - self._last_command_end
+            self.min_gap = gap if self.min_gap is None else min(self.min_gap, gap)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await super().send_cmd_raw(cmd)
+        finally:
+            self.in_flight -= 1
+            self._last_command_end = time.monotonic()
+
+
+class StressRun:
+    """A WalkingPad, its coordinator and its control entities under load."""
+
+    def __init__(self, hass: HomeAssistant, args: argparse.Namespace) -> None:
+        """Create the WalkingPad and its entities."""
+        self.emulator: MonitoredEmulator | None = None
+        self.command_spacing = args.command_spacing
+        self.device = WalkingPad(
+            "WalkingPad stress",
+            BLEDevice(DEVICE_ADDRESS, "WalkingPad stress", None),
+            command_spacing=args.command_spacing,
+            controller_factory=partial(
+                self._create_emulator,
+                latency=args.latency,
+                latency_jitter=args.latency,
+                start_delay=0,
+                # The speed is reached at once, the final state does not depend
+                # on the belt ramps.
+                acceleration=1000,
+                seed=args.seed,
+            ),
+        )
+        self.coordinator = WalkingPadCoordinator(hass, self.device)
+        self.switch = WalkingPadBeltSwitchManual(self.coordinator)
+        self.number = WalkingPadSpeedNumberEntity(self.coordinator)
+        self.latencies: dict[str, list[float]] = {}
+        # Call index of the last belt request and whether it turned the belt on.
+        self.last_belt_request: tuple[int, bool] | None = None
+        # Call index and value of the last speed change forwarded to the device.
+        self.last_speed_request: tuple[int, float] | None = None
+
+    def _create_emulator(self, *args, **kwargs) -> MonitoredEmulator:
+        self.emulator = MonitoredEmulator(*args, **kwargs)
+        return self.emulator
+
+    async def start(self) -> None:
+        """Connect the emulated WalkingPad, in manual mode."""
+        await self.device.connect()
+        assert self.emulator is not None
+        self.emulator.mode = WalkingPadMode.MANUAL
+        self.emulator.belt_state = BeltState.STOPPED
+        await self.coordinator.async_refresh()
+
+    async def stop(self) -> None:
+        """Disconnect the emulated WalkingPad."""
+        await self.device.disconnect()
+        self.device.shutdown()
+
+    async def _call(self, name: str, call: Callable[[], Awaitable[object]]) -> None:
+        start = time.perf_counter()
+        await call()
+        self.latencies.setdefault(name, []).append(time.perf_counter() - start)
+
+    def fire(self, index: int, rng: random.Random) -> asyncio.Task:
+        """Fire a random call, recording the requests it makes."""
+        operation = rng.choices(
+            ("turn_on", "turn_off", "set_speed", "refresh"), weights=(2, 2, 4, 2)
+        )[0]
+        if operation == "turn_on":
+            self.last_belt_request = (index, True)
+            call = self.switch.async_turn_on
+        elif operation == "turn_off":
+            self.last_belt_request = (index, False)
+            call = self.switch.async_turn_off
+        elif operation == "set_speed":
+            speed = rng.choice(SPEEDS)
+            # Like the entity, which ignores the speed while the belt is stopped.
+            if self.coordinator.status.belt_state in (
+                BeltState.ACTIVE,
+                BeltState.STARTING,
+            ):
+                self.last_speed_request = (index, speed)
+            call = partial(self.number.async_set_native_value, speed)
+        else:
+            call = self.coordinator.async_refresh
+        return asyncio.get_running_loop().create_task(self._call(operation, call))
+
+    async def settle(self) -> None:
+        """Wait until the WalkingPad reports the state of the last requests."""
+        expected_on = self.last_belt_request is not None and self.last_belt_request[1]
+        expected_speed = self._expected_speed()
+        async with asyncio.timeout(SETTLE_TIMEOUT_SECONDS):
+            while True:
+                await self.device.update_state()
+                status = self.coordinator.status
+                is_on = status.belt_state in (BeltState.ACTIVE, BeltState.STARTING)
+                if is_on == expected_on and expected_speed in (None, status.speed):
+                    return
+                await asyncio.sleep(self.command_spacing)
+
+    def _expected_speed(self) -> float | None:
+        """Return the speed the belt must end at, if the requests define it."""
+        if (
+            self.last_belt_request is None
+            or not self.last_belt_request[1]
+            or self.last_speed_request is None
+            or self.last_speed_request[0] < self.last_belt_request[0]
+        ):
+            # The belt is stopped, or restarted at its start speed.
+            return None
+        return self.last_speed_request[1]
+
+    def check_final_state(self) -> list[str]:
+        """Return the differences between the final state and the last requests."""
+        assert self.emulator is not None
+        errors = []
+        expected_on = self.last_belt_request is not None and self.last_belt_request[1]
+        device_on = self.emulator.belt_state in (BeltState.ACTIVE, BeltState.STARTING)
+        if device_on != expected_on:
+            errors.append(
+                f"belt is {self.emulator.belt_state.name.lower()},"
+                f" last request turned it {'on' if expected_on else 'off'}"
+            )
+        if self.switch.is_on != device_on:
+            errors.append(f"switch displays {self.switch.is_on}, belt is {device_on}")
+        if (expected_speed := self._expected_speed()) is not None:
+            if self.emulator.speed != expected_speed:
+                errors.append(
+                    f"belt speed is {self.emulator.speed}, last request {expected_speed}"
+                )
+            if self.number.native_value != expected_speed:
+                errors.append(
+                    f"number displays {self.number.native_value},"
+                    f" last request {expected_speed}"
+                )
+        return errors
+
+
+async def stress(hass: HomeAssistant, args: argparse.Namespace) -> bool:
+    """Run the stress test, return true if all the checks passed."""
+    rng = random.Random(args.seed)
+    run = StressRun(hass, args)
+    await run.start()
+    assert run.emulator is not None
+    errors = []
+    try:
+        start = time.perf_counter()
+        tasks = []
+        for index in range(args.calls):
+            tasks.append(run.fire(index, rng))
+            await asyncio.sleep(rng.uniform(0, args.max_interval))
+        await asyncio.gather(*tasks)
+        wall_time = time.perf_counter() - start
+        try:
+            await run.settle()
+        except TimeoutError:
+            errors.append("the WalkingPad did not settle to the last requests")
+        errors.extend(run.check_final_state())
+    finally:
+        await run.stop()
+
+    emulator = run.emulator
+    throughput = args.calls / wall_time
+    all_latencies = [value for values in run.latencies.values() for value in values]
+    p99 = _percentile(all_latencies, 99) * 1000
+
+    print(
+        f"{args.calls} calls in {wall_time:.1f}s ({throughput:.1f} calls/s),"
+        f" {emulator.received_commands} commands received by the WalkingPad,"
+        f" {run.device.coalesced_commands} coalesced"
+    )
+    print(f"{'call':>10} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, values in sorted(run.latencies.items()):
+        latencies_ms = [value * 1000 for value in values]
+        print(
+            f"{name:>10} {len(values):>6} {_percentile(latencies_ms, 50):>8.1f}"
+            f" {_percentile(latencies_ms, 95):>8.1f}"
+            f" {_percentile(latencies_ms, 99):>8.1f}"
+        )
+    min_gap = emulator.min_gap if emulator.min_gap is not None else 0.0
+    print(
+        f"max commands in flight {emulator.max_in_flight},"
+        f" min gap between commands {min_gap * 1000:.1f}ms"
+    )
+
+    if emulator.max_in_flight > 1:
+        errors.append(f"{emulator.max_in_flight} commands overlapped")
+    if min_gap < args.command_spacing - SPACING_TOLERANCE_SECONDS:
+        errors.append(
+            f"commands spaced by {min_gap * 1000:.1f}ms,"
+            f" less than {args.command_spacing * 1000:.0f}ms"
+        )
+    if throughput < args.min_throughput:
+        errors.append(
+            f"throughput {throughput:.1f} calls/s below {args.min_throughput}"
+        )
+    if p99 > args.max_p99:
+        errors.append(f"p99 latency {p99:.0f}ms above {args.max_p99:.0f}ms")
+
+    for error in errors:
+        print(f"FAILED: {error}")
+    if not errors:
+        print("PASSED")
+    return not errors
+
+
+async def main(args: argparse.Namespace) -> bool:
+    """Run the stress test."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        frame.async_setup(hass)
+        try:
+            return await stress(hass, args)
+        finally:
+            await hass.async_stop(force=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=500, help="number of calls")
+    parser.add_argument(
+        "--max-interval",
+        type=float,
+        default=0.02,
+        help="maximal delay between two calls, in seconds",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.005,
+        help="emulated bluetooth latency, in seconds",
+    )
+    parser.add_argument(
+        "--command-spacing",
+        type=float,
+        default=0.02,
+        help="minimal delay between two commands, in seconds",
+    )
+    parser.add_argument(
+        "--min-throughput",
+        type=float,
+        default=20,
+        help="minimal number of calls completed per second",
+    )
+    parser.add_argument(
+        "--max-p99",
+        type=float,
+        default=2000,
+        help="maximal 99th percentile of the call latency, in milliseconds",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    sys.exit(0 if asyncio.run(main(parser.parse_args())) else 1)
@@ -2,34 +2,269 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
+from datetime import timedelta
+from pathlib import Path
 from typing import TypedDict
 
+import voluptuous as vol
+from bleak.backends.device import BLEDevice
 from homeassistant.components import bluetooth
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import (
+    ConfigEntryNotReady,
+    HomeAssistantError,
+    ServiceValidationError,
+)
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.service import async_register_admin_service
+from homeassistant.helpers.typing import ConfigType
+from homeassistant.util import dt as dt_util
 
-from .const import CONF_MAC, CONF_NAME, DOMAIN
+from .capture import CAPTURE_FILE_SUFFIX, WalkingPadCapture
+from .const import (
+    ATTR_DURATION,
+    ATTR_FILENAME,
+    CAPTURE_DIRECTORY,
+    CONF_IDLE_DISCONNECT_MINUTES,
+    CONF_MAC,
+    CONF_METRICS_WINDOW_SECONDS,
+    CONF_NAME,
+    CONF_STATISTICS_IMPORT,
+    DEFAULT_CAPTURE_DURATION_SECONDS,
+    DEFAULT_IDLE_DISCONNECT_MINUTES,
+    DEFAULT_METRICS_WINDOW_SECONDS,
+    DEFAULT_PROFILE_DURATION_SECONDS,
+    DEFAULT_STATISTICS_IMPORT,
+    DOMAIN,
+    PROFILE_DIRECTORY,
+    SERVICE_CAPTURE,
+    SERVICE_PROFILE,
+    SESSIONS_DIRECTORY,
+)
 from .coordinator import WalkingPadCoordinator
+from .odometer import WalkingPadOdometer
+from .profiler import HotPathProfiler, format_summary
+from .session import SESSION_FILE_SUFFIX, WalkingPadSessionRecorder
+from .statistics import WalkingPadStatisticsImporter
 from .walkingpad import WalkingPad
 
 PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.SWITCH, Platform.NUMBER]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DURATION, default=DEFAULT_PROFILE_DURATION_SECONDS): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=3600)
+        ),
+        # A plain file name, the report is written in the profiles directory.
+        vol.Optional(ATTR_FILENAME): vol.All(cv.string, vol.Match(r"^[\w.-]+$")),
+    }
+)
+
+CAPTURE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DURATION, default=DEFAULT_CAPTURE_DURATION_SECONDS): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=4 * 3600)
+        ),
+    }
+)
+
 
 class WalkingPadIntegrationData(TypedDict):
     """A type to represent the data stored by the integration for each entity."""
 
     device: WalkingPad
     coordinator: WalkingPadCoordinator
+    odometer: WalkingPadOdometer
+    session_recorder: WalkingPadSessionRecorder
+    statistics_importer: WalkingPadStatisticsImporter | None
 
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def _idle_disconnect_timeout(entry: ConfigEntry) -> timedelta | None:
+    """Return the idle time after which the device is disconnected, if enabled."""
+    minutes = entry.options.get(
+        CONF_IDLE_DISCONNECT_MINUTES, DEFAULT_IDLE_DISCONNECT_MINUTES
+    )
+    return timedelta(minutes=minutes) if minutes else None
+
+
+def _metrics_window_seconds(entry: ConfigEntry) -> int:
+    """Return the running time the pace, cadence and average speed span."""
+    return entry.options.get(
+        CONF_METRICS_WINDOW_SECONDS, DEFAULT_METRICS_WINDOW_SECONDS
+    )
+
+
+def _statistics_import(entry: ConfigEntry) -> bool:
+    """Return whether the totals are imported to the long-term statistics."""
+    return entry.options.get(CONF_STATISTICS_IMPORT, DEFAULT_STATISTICS_IMPORT)
+
+
+def _loaded_integrations(hass: HomeAssistant) -> list[WalkingPadIntegrationData]:
+    """Return the data of the loaded WalkingPads, raise if there is none."""
+    integrations_data: dict[str, WalkingPadIntegrationData] = hass.data.get(DOMAIN, {})
+    if not integrations_data:
+        raise HomeAssistantError("No WalkingPad is loaded")
+    return list(integrations_data.values())
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the walkingpad services."""
+    profile_task: asyncio.Task | None = None
+    capture_task: asyncio.Task | None = None
+
+    async def _async_run_profile(
+        devices: list[tuple[WalkingPad, WalkingPadCoordinator]],
+        duration: float,
+        path: Path | None,
+    ) -> None:
+        """Time the hot paths, then write or log the report."""
+        summary = await HotPathProfiler().async_profile(devices, duration)
+        report = format_summary(summary)
+        if path is None:
+            _LOGGER.warning("WalkingPad profile over %s seconds:\n%s", duration, report)
+            return
+        try:
+            await hass.async_add_executor_job(_write_report, path, report)
+        except OSError as err:
+            _LOGGER.warning(
+                "Unable to write the WalkingPad profile to %s: %s", path, err
+            )
+        else:
+            _LOGGER.info("WalkingPad profile written to %s", path)
+
+    async def _async_profile(call: ServiceCall) -> ServiceResponse:
+        """Start timing the hot paths of the loaded WalkingPads."""
+        nonlocal profile_task
+        devices = [
+            (integration_data["device"], integration_data["coordinator"])
+            for integration_data in _loaded_integrations(hass)
+        ]
+        if profile_task is not None and not profile_task.done():
+            raise HomeAssistantError("A profiling session is already running")
+
+        path = None
+        if filename := call.data.get(ATTR_FILENAME):
+            path = Path(hass.config.path(PROFILE_DIRECTORY, filename))
+            if await hass.async_add_executor_job(path.exists):
+                raise ServiceValidationError(f"{path} already exists")
+
+        profile_task = hass.async_create_background_task(
+            _async_run_profile(devices, call.data[ATTR_DURATION], path),
+            "Profile the WalkingPad hot paths",
+        )
+        return {"file": str(path) if path is not None else None}
+
+    async def _async_run_capture(
+        devices: list[WalkingPad], duration: float, paths: dict[str, Path]
+    ) -> None:
+        """Record the frames for a while, then write the capture files."""
+        for device in devices:
+            device.start_capture()
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            captures = [(device, device.stop_capture()) for device in devices]
+
+        for device, capture in captures:
+            if capture is None:
+                continue
+            path = paths[device.mac]
+            try:
+                await hass.async_add_executor_job(_write_capture, capture, path)
+            except OSError as err:
+                _LOGGER.warning(
+                    "Unable to write the WalkingPad capture to %s: %s", path, err
+                )
+                continue
+            _LOGGER.info(
+                "WalkingPad capture of %s frames written to %s", capture.records, path
+            )
+
+    async def _async_capture(call: ServiceCall) -> ServiceResponse:
+        """Start recording the frames exchanged with the loaded WalkingPads."""
+        nonlocal capture_task
+        devices = [
+            integration_data["device"]
+            for integration_data in _loaded_integrations(hass)
+        ]
+        if capture_task is not None and not capture_task.done():
+            raise HomeAssistantError("A capture is already running")
+
+        started = dt_util.now().strftime("%Y%m%d_%H%M%S")
+        directory = Path(hass.config.path(CAPTURE_DIRECTORY))
+        paths = {
+            device.mac: directory
+            / f"{device.mac.replace(':', '').lower()}_{started}{CAPTURE_FILE_SUFFIX}"
+            for device in devices
+        }
+        capture_task = hass.async_create_background_task(
+            _async_run_capture(devices, call.data[ATTR_DURATION], paths),
+            "Capture the WalkingPad frames",
+        )
+        return {"files": {device.name: str(paths[device.mac]) for device in devices}}
+
+    async_register_admin_service(
+        hass,
+        DOMAIN,
+        SERVICE_PROFILE,
+        _async_profile,
+        schema=PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    async_register_admin_service(
+        hass,
+        DOMAIN,
+        SERVICE_CAPTURE,
+        _async_capture,
+        schema=CAPTURE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    return True
+
+
+def _write_report(path: Path, report: str) -> None:
+    """Write a profile report, refusing to overwrite an existing file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("x", encoding="utf-8") as file:
+        file.write(f"{report}\n")
+
+
+def _write_capture(capture: WalkingPadCapture, path: Path) -> None:
+    """Write a capture file, creating its directory."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    capture.write(path)
+
+
 async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Update options and reload platforms."""
+    integration_data: WalkingPadIntegrationData = hass.data[DOMAIN][entry.entry_id]
+    if _statistics_import(entry) != (
+        integration_data["statistics_importer"] is not None
+    ):
+        # The sensors are recorded differently, the whole entry is set up again.
+        hass.config_entries.async_schedule_reload(entry.entry_id)
+        return
+    integration_data["coordinator"].idle_disconnect_timeout = _idle_disconnect_timeout(
+        entry
+    )
+    integration_data["coordinator"].derived_metrics.set_window(
+        _metrics_window_seconds(entry)
+    )
     await hass.config_entries.async_unload_platforms(
         entry, [Platform.SWITCH, Platform.NUMBER]
     )
@@ -38,15 +273,34 @@ async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
     )
 
 
+@callback
+def _async_best_ble_device(hass: HomeAssistant, address: str) -> BLEDevice | None:
+    """Return the device seen by the best connectable bluetooth source.
+
+    Sources with a free connection slot are preferred, then the strongest signal.
+    """
+    scanner_devices = bluetooth.async_scanner_devices_by_address(
+        hass, address, connectable=True
+    )
+    available_devices = [
+        scanner_device
+        for scanner_device in scanner_devices
+        if scanner_device.scanner.connector is not None
+        and scanner_device.scanner.connector.can_connect()
+    ]
+    if candidates := available_devices or scanner_devices:
+        best = max(candidates, key=lambda candidate: candidate.advertisement.rssi)
+        return best.ble_device
+    return bluetooth.async_ble_device_from_address(hass, address, connectable=True)
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up walkingpad from a config entry."""
 
     hass.data.setdefault(DOMAIN, {})
     address = entry.data.get(CONF_MAC)
 
-    ble_device = bluetooth.async_ble_device_from_address(
-        hass, entry.data.get(CONF_MAC), connectable=True
-    )
+    ble_device = _async_best_ble_device(hass, address)
     if ble_device is None:
         # Check if any HA scanner on:
         count_scanners = bluetooth.async_scanner_count(hass, connectable=True)
@@ -60,14 +314,74 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     name = entry.data.get(CONF_NAME) or DOMAIN
     walkingpad_device = WalkingPad(name, ble_device)
-    coordinator = WalkingPadCoordinator(hass, walkingpad_device)
+    coordinator = WalkingPadCoordinator(
+        hass,
+        walkingpad_device,
+        _idle_disconnect_timeout(entry),
+        _metrics_window_seconds(entry),
+    )
+
+    odometer = WalkingPadOdometer(hass, coordinator)
+    await odometer.async_load()
+    odometer.async_start()
+    entry.async_on_unload(odometer.async_stop)
+
+    session_recorder = WalkingPadSessionRecorder(
+        hass,
+        coordinator,
+        Path(
+            hass.config.path(
+                SESSIONS_DIRECTORY,
+                f"{address.replace(':', '').lower()}{SESSION_FILE_SUFFIX}",
+            )
+        ),
+    )
+    await session_recorder.async_load()
+    session_recorder.async_start()
+    entry.async_on_unload(session_recorder.async_stop)
+
+    statistics_importer = None
+    if _statistics_import(entry):
+        if "recorder" in hass.config.components:
+            statistics_importer = WalkingPadStatisticsImporter(hass, coordinator, name)
+            statistics_importer.async_start()
+            entry.async_on_unload(statistics_importer.async_stop)
+        else:
+            _LOGGER.warning(
+                "The recorder is not loaded, the totals of %s are not imported to"
+                " the long-term statistics",
+                name,
+            )
 
     integration_data: WalkingPadIntegrationData = {
         "device": walkingpad_device,
         "coordinator": coordinator,
+        "odometer": odometer,
+        "session_recorder": session_recorder,
+        "statistics_importer": statistics_importer,
     }
     hass.data[DOMAIN][entry.entry_id] = integration_data
 
+    @callback
+    def _async_on_advertisement(
+        service_info: bluetooth.BluetoothServiceInfoBleak,
+        change: bluetooth.BluetoothChange,
+    ) -> None:
+        """Connect through the best source and reconnect when the device is back."""
+        walkingpad_device.set_ble_device(
+            _async_best_ble_device(hass, address) or service_info.device
+        )
+        walkingpad_device.notify_presence()
+
+    entry.async_on_unload(
+        bluetooth.async_register_callback(
+            hass,
+            _async_on_advertisement,
+            bluetooth.BluetoothCallbackMatcher(address=address, connectable=True),
+            bluetooth.BluetoothScanningMode.PASSIVE,
+        )
+    )
+
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
     entry.async_on_unload(entry.add_update_listener(async_update_options))
@@ -78,6 +392,9 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+        integration_data: WalkingPadIntegrationData = hass.data[DOMAIN].pop(
+            entry.entry_id
+        )
+        integration_data["device"].shutdown()
 
     return unload_ok
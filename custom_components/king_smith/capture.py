@@ -0,0 +1,117 @@
+"""Capture and replay of the frames exchanged with a WalkingPad."""
+
+from __future__ import annotations
+
+import asyncio
+import struct
+import time
+from collections.abc import Callable, Iterator
+from enum import IntEnum, unique
+from pathlib import Path
+from typing import NamedTuple
+
+CAPTURE_MAGIC = b"KSWPCAP1"
+CAPTURE_FILE_SUFFIX = ".kscap"
+
+# Record header: seconds since the capture start, direction and frame length.
+_RECORD_HEADER = struct.Struct("<dBB")
+
+
+@unique
+class CaptureDirection(IntEnum):
+    """An enumeration of the directions of the captured frames."""
+
+    NOTIFICATION = 0
+    COMMAND = 1
+
+
+class CaptureRecord(NamedTuple):
+    """A frame captured at a time relative to the capture start."""
+
+    timestamp: float
+    direction: CaptureDirection
+    data: bytes
+
+
+class WalkingPadCapture:
+    """The raw frames exchanged with a WalkingPad, with their monotonic time.
+
+    Frames are appended to an in-memory buffer, a record takes 10 bytes plus the
+    frame. Writing the capture to a file is blocking.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        """Start an empty capture."""
+        self._clock = clock
+        self._start = clock()
+        self._buffer = bytearray(CAPTURE_MAGIC)
+        self.records = 0
+
+    def record(self, direction: CaptureDirection, data: bytes | bytearray) -> None:
+        """Append a frame to the capture."""
+        self._buffer += _RECORD_HEADER.pack(
+            self._clock() - self._start, direction, len(data)
+        )
+        self._buffer += data
+        self.records += 1
+
+    def to_bytes(self) -> bytes:
+        """Return the content of the capture file."""
+        return bytes(self._buffer)
+
+    def write(self, path: Path) -> None:
+        """Write the capture to a file."""
+        path.write_bytes(self._buffer)
+
+
+def parse_capture(content: bytes) -> Iterator[CaptureRecord]:
+    """Iterate over the records of a capture file content.
+
+    Raise ValueError if the content is not a capture.
+    """
+    if not content.startswith(CAPTURE_MAGIC):
+        raise ValueError("Not a WalkingPad capture")
+    view = memoryview(content)
+    offset = len(CAPTURE_MAGIC)
+    while offset < len(content):
+        if offset + _RECORD_HEADER.size > len(content):
+            raise ValueError(f"Truncated WalkingPad capture record at {offset}")
+        timestamp, direction, length = _RECORD_HEADER.unpack_from(content, offset)
+        offset += _RECORD_HEADER.size
+        if offset + length > len(content):
+            raise ValueError(f"Truncated WalkingPad capture record at {offset}")
+        yield CaptureRecord(
+            timestamp,
+            CaptureDirection(direction),
+            bytes(view[offset : offset + length]),
+        )
+        offset += length
+
+
+def read_capture(path: Path) -> list[CaptureRecord]:
+    """Read the records of a capture file."""
+    return list(parse_capture(path.read_bytes()))
+
+
+async def async_replay(
+    records: list[CaptureRecord],
+    notify: Callable[[bytes], None],
+    speed: float | None = 1.0,
+) -> int:
+    """Feed the captured notifications to a handler, return their number.
+
+    The notifications are spaced like in the capture, divided by the speed, or
+    fed without waiting if the speed is None. The captured commands are not
+    sent again: they are replayed through the notifications they caused.
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    notifications = 0
+    for timestamp, direction, data in records:
+        if direction is not CaptureDirection.NOTIFICATION:
+            continue
+        if speed is not None and (delay := start + timestamp / speed - loop.time()) > 0:
+            await asyncio.sleep(delay)
+        notify(data)
+        notifications += 1
+    return notifications
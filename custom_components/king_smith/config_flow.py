@@ -14,12 +14,21 @@ from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import device_registry as dr
 
 from .const import (
+    CONF_CONNECTION,
+    CONF_HISTORY,
+    CONF_IDLE_DISCONNECT_MINUTES,
     CONF_MAC,
+    CONF_METRICS,
+    CONF_METRICS_WINDOW_SECONDS,
     CONF_NAME,
     CONF_PREFERRED_MODE,
     CONF_REMOTE_CONTROL,
     CONF_REMOTE_CONTROL_ENABLED,
+    CONF_STATISTICS_IMPORT,
+    DEFAULT_IDLE_DISCONNECT_MINUTES,
+    DEFAULT_METRICS_WINDOW_SECONDS,
     DEFAULT_PREFERRED_MODE,
+    DEFAULT_STATISTICS_IMPORT,
     DOMAIN,
     PREFERRED_MODE_OPTIONS,
 )
@@ -193,12 +202,27 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             preferred_mode = remote_control_data.get(
                 CONF_PREFERRED_MODE, DEFAULT_PREFERRED_MODE
             )
+            connection_data = user_input.get(CONF_CONNECTION, {})
+            idle_disconnect_minutes = connection_data.get(
+                CONF_IDLE_DISCONNECT_MINUTES, DEFAULT_IDLE_DISCONNECT_MINUTES
+            )
+            metrics_data = user_input.get(CONF_METRICS, {})
+            metrics_window_seconds = metrics_data.get(
+                CONF_METRICS_WINDOW_SECONDS, DEFAULT_METRICS_WINDOW_SECONDS
+            )
+            history_data = user_input.get(CONF_HISTORY, {})
+            statistics_import = history_data.get(
+                CONF_STATISTICS_IMPORT, DEFAULT_STATISTICS_IMPORT
+            )
 
             return self.async_create_entry(
                 title="",
                 data={
                     CONF_REMOTE_CONTROL_ENABLED: remote_control_enabled,
                     CONF_PREFERRED_MODE: preferred_mode,
+                    CONF_IDLE_DISCONNECT_MINUTES: idle_disconnect_minutes,
+                    CONF_METRICS_WINDOW_SECONDS: metrics_window_seconds,
+                    CONF_STATISTICS_IMPORT: statistics_import,
                 },
             )
 
@@ -208,6 +232,15 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         preferred_mode = self.config_entry.options.get(
             CONF_PREFERRED_MODE, DEFAULT_PREFERRED_MODE
         )
+        idle_disconnect_minutes = self.config_entry.options.get(
+            CONF_IDLE_DISCONNECT_MINUTES, DEFAULT_IDLE_DISCONNECT_MINUTES
+        )
+        metrics_window_seconds = self.config_entry.options.get(
+            CONF_METRICS_WINDOW_SECONDS, DEFAULT_METRICS_WINDOW_SECONDS
+        )
+        statistics_import = self.config_entry.options.get(
+            CONF_STATISTICS_IMPORT, DEFAULT_STATISTICS_IMPORT
+        )
 
         return self.async_show_form(
             step_id="init",
@@ -228,6 +261,39 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                         ),
                         {"collapsed": True},
                     ),
+                    vol.Required(CONF_CONNECTION): section(
+                        vol.Schema(
+                            {
+                                vol.Required(
+                                    CONF_IDLE_DISCONNECT_MINUTES,
+                                    default=idle_disconnect_minutes,
+                                ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                            }
+                        ),
+                        {"collapsed": True},
+                    ),
+                    vol.Required(CONF_METRICS): section(
+                        vol.Schema(
+                            {
+                                vol.Required(
+                                    CONF_METRICS_WINDOW_SECONDS,
+                                    default=metrics_window_seconds,
+                                ): vol.All(vol.Coerce(int), vol.Range(min=10, max=600)),
+                            }
+                        ),
+                        {"collapsed": True},
+                    ),
+                    vol.Required(CONF_HISTORY): section(
+                        vol.Schema(
+                            {
+                                vol.Required(
+                                    CONF_STATISTICS_IMPORT,
+                                    default=statistics_import,
+                                ): bool,
+                            }
+                        ),
+                        {"collapsed": True},
+                    ),
                 }
             ),
         )
@@ -0,0 +1,266 @@
+"""Connection management for the WalkingPad."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import random
+import time
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime
+from enum import Enum, unique
+
+from bleak import BleakError
+
+_LOGGER = logging.getLogger(__name__)
+
+# Bounds a single connection attempt, including the service discovery.
+CONNECT_TIMEOUT_SECONDS = 20
+
+# The delay between two failed connection attempts doubles up to the maximum.
+RECONNECT_BACKOFF_BASE_SECONDS = 2
+RECONNECT_BACKOFF_MAX_SECONDS = 300
+
+# The link is checked when no command has been sent for this long.
+KEEPALIVE_INTERVAL_SECONDS = 60
+
+# A device not seen advertising for this long is considered away, and seeing it
+# again triggers an immediate reconnection.
+PRESENCE_TIMEOUT_SECONDS = 60
+
+# An idle device keeps advertising: one of its advertisements is used to
+# reconnect and check its status this long after the disconnection, so that a
+# belt started with the remote is noticed.
+IDLE_RECONNECT_INTERVAL_SECONDS = 300
+
+
+@unique
+class WalkingPadConnectionStatus(Enum):
+    """An enumeration of the possible connection states."""
+
+    NOT_CONNECTED = 0
+    CONNECTING = 1
+    CONNECTED = 2
+    BACKOFF = 3
+    IDLE = 4
+
+
+class WalkingPadConnectionManager:
+    """Keep the link to a WalkingPad up, reconnecting with a backoff on failures."""
+
+    def __init__(
+        self,
+        connect: Callable[[], Awaitable[None]],
+        disconnect: Callable[[], Awaitable[None]],
+        keepalive: Callable[[], Awaitable[None]],
+        connect_timeout: float = CONNECT_TIMEOUT_SECONDS,
+    ) -> None:
+        """Create a connection manager."""
+        self._connect = connect
+        self._disconnect = disconnect
+        self._keepalive = keepalive
+        self._connect_timeout = connect_timeout
+        self._status = WalkingPadConnectionStatus.NOT_CONNECTED
+        self._task: asyncio.Task | None = None
+        self._connected = asyncio.Event()
+        self._wakeup = asyncio.Event()
+        self._failures = 0
+        self._last_activity = 0.0
+        self._last_seen: float | None = None
+        self._suspended_at = 0.0
+        self._callbacks: list[Callable[[WalkingPadConnectionStatus], None]] = []
+        self.connections = 0
+        self.connection_failures = 0
+        self.connected_since: datetime | None = None
+
+    @property
+    def status(self) -> WalkingPadConnectionStatus:
+        """Connection status."""
+        return self._status
+
+    @property
+    def connected(self) -> bool:
+        """Boolean property to check if the device is connected."""
+        return self._status == WalkingPadConnectionStatus.CONNECTED
+
+    @property
+    def reconnects(self) -> int:
+        """Number of connections established after the first one."""
+        return max(0, self.connections - 1)
+
+    def register_status_callback(
+        self, callback: Callable[[WalkingPadConnectionStatus], None]
+    ) -> None:
+        """Register a callback called on each connection status change."""
+        self._callbacks.append(callback)
+
+    def _set_status(self, status: WalkingPadConnectionStatus) -> None:
+        if status == self._status:
+            return
+        _LOGGER.debug("WalkingPad connection status : %s", status.name.lower())
+        self._status = status
+        if status == WalkingPadConnectionStatus.CONNECTED:
+            self.connected_since = datetime.now(UTC)
+            self._connected.set()
+        else:
+            self.connected_since = None
+            self._connected.clear()
+        for callback in self._callbacks:
+            callback(status)
+
+    def start(self) -> None:
+        """Start keeping the link up."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(
+                self._run(), name="WalkingPad connection manager"
+            )
+
+    async def stop(
+        self,
+        status: WalkingPadConnectionStatus = WalkingPadConnectionStatus.NOT_CONNECTED,
+    ) -> None:
+        """Stop keeping the link up and disconnect the device."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self._status in (
+            WalkingPadConnectionStatus.CONNECTED,
+            WalkingPadConnectionStatus.CONNECTING,
+        ):
+            try:
+                await self._disconnect()
+            except (BleakError, TimeoutError) as err:
+                _LOGGER.debug("Error while disconnecting the WalkingPad : %s", err)
+        self._failures = 0
+        # The device advertises again once disconnected, it is not coming back.
+        self._last_seen = time.monotonic()
+        self._set_status(status)
+
+    async def suspend(self) -> None:
+        """Disconnect the device to free the connection slot until it is needed.
+
+        The link is brought up again by the next command, when the device
+        advertises after being away, or by an advertisement received once the
+        idle reconnect interval has elapsed.
+        """
+        _LOGGER.info("Disconnecting idle WalkingPad")
+        await self.stop(WalkingPadConnectionStatus.IDLE)
+        self._suspended_at = time.monotonic()
+
+    def shutdown(self) -> None:
+        """Stop the connection task without waiting for a clean disconnection."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def wait_connected(self, timeout: float = CONNECT_TIMEOUT_SECONDS) -> bool:
+        """Wait for the link to be up, starting the connection if needed.
+
+        A connection waiting for its backoff delay is retried immediately.
+        """
+        if self.connected:
+            return True
+        self.start()
+        self._wakeup.set()
+        try:
+            async with asyncio.timeout(timeout):
+                await self._connected.wait()
+        except TimeoutError:
+            return False
+        return True
+
+    def notify_activity(self) -> None:
+        """Record that the link has just been used successfully."""
+        self._last_activity = time.monotonic()
+
+    def notify_connection_lost(self) -> None:
+        """Record that the link has been lost, a reconnection is started."""
+        if self._status != WalkingPadConnectionStatus.CONNECTED:
+            return
+        _LOGGER.info("Connection to WalkingPad lost")
+        self._set_status(WalkingPadConnectionStatus.NOT_CONNECTED)
+        self._wakeup.set()
+
+    def notify_presence(self) -> None:
+        """Record that the device has been seen advertising.
+
+        A device coming back after being away is reconnected immediately. An
+        idle device is also reconnected periodically, to check its status.
+        """
+        now = time.monotonic()
+        was_away = (
+            self._last_seen is None or now - self._last_seen > PRESENCE_TIMEOUT_SECONDS
+        )
+        self._last_seen = now
+        if self._status == WalkingPadConnectionStatus.BACKOFF and was_away:
+            _LOGGER.debug("WalkingPad is advertising again, reconnecting")
+            self._failures = 0
+            self._wakeup.set()
+        elif self._status == WalkingPadConnectionStatus.IDLE and (
+            was_away or now - self._suspended_at >= IDLE_RECONNECT_INTERVAL_SECONDS
+        ):
+            _LOGGER.debug("Idle WalkingPad is advertising, reconnecting")
+            self.start()
+
+    def _backoff_delay(self) -> float:
+        delay = min(
+            RECONNECT_BACKOFF_MAX_SECONDS,
+            RECONNECT_BACKOFF_BASE_SECONDS * 2 ** (self._failures - 1),
+        )
+        # Jitter the delay, so that devices don't retry in lockstep.
+        return delay * random.uniform(0.5, 1)
+
+    async def _sleep(self, delay: float) -> None:
+        """Sleep for the given delay, or until woken up."""
+        with contextlib.suppress(TimeoutError):
+            async with asyncio.timeout(delay):
+                await self._wakeup.wait()
+        self._wakeup.clear()
+
+    async def _try_connect(self) -> bool:
+        _LOGGER.info("Connecting to WalkingPad")
+        try:
+            async with asyncio.timeout(self._connect_timeout):
+                await self._connect()
+        except (BleakError, TimeoutError) as err:
+            _LOGGER.warning("Unable to connect to WalkingPad : %s", err)
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.warning("Unable to connect to WalkingPad")
+        else:
+            return True
+        self.connection_failures += 1
+        with contextlib.suppress(Exception):
+            await self._disconnect()
+        return False
+
+    async def _run(self) -> None:
+        while True:
+            if self._status == WalkingPadConnectionStatus.CONNECTED:
+                idle = time.monotonic() - self._last_activity
+                if idle < KEEPALIVE_INTERVAL_SECONDS:
+                    await self._sleep(KEEPALIVE_INTERVAL_SECONDS - idle)
+                else:
+                    try:
+                        await self._keepalive()
+                    except Exception as err:  # pylint: disable=broad-except
+                        _LOGGER.debug("WalkingPad keepalive failed : %s", err)
+                    self.notify_activity()
+                continue
+
+            self._set_status(WalkingPadConnectionStatus.CONNECTING)
+            self._wakeup.clear()
+            if await self._try_connect():
+                self._failures = 0
+                self.connections += 1
+                self.notify_activity()
+                self._set_status(WalkingPadConnectionStatus.CONNECTED)
+                continue
+
+            self._failures += 1
+            self._set_status(WalkingPadConnectionStatus.BACKOFF)
+            delay = self._backoff_delay()
+            _LOGGER.debug("Next connection attempt in %.0fs", delay)
+            await self._sleep(delay)
@@ -1,17 +1,28 @@
 """Constants for the walkingpad integration."""
 
 from enum import Enum, IntEnum, unique
-from typing import Final, TypedDict
+from typing import Final, NamedTuple
 
 DOMAIN = "king_smith"
 
 
+CONF_CONNECTION: Final = "connection"
+CONF_HISTORY: Final = "history"
+CONF_IDLE_DISCONNECT_MINUTES: Final = "idle_disconnect_minutes"
 CONF_REMOTE_CONTROL: Final = "remote_control"
 CONF_REMOTE_CONTROL_ENABLED: Final = "remote_control_enabled"
 CONF_MAC: Final = "mac"
+CONF_METRICS: Final = "metrics"
+CONF_METRICS_WINDOW_SECONDS: Final = "metrics_window_seconds"
 CONF_MODE: Final = "mode"
 CONF_NAME: Final = "name"
 CONF_PREFERRED_MODE: Final = "preferred_mode"
+CONF_STATISTICS_IMPORT: Final = "statistics_import"
+
+SERVICE_CAPTURE: Final = "capture"
+SERVICE_PROFILE: Final = "profile"
+ATTR_DURATION: Final = "duration"
+ATTR_FILENAME: Final = "filename"
 
 
 @unique
@@ -32,16 +43,31 @@ class WalkingPadMode(Enum):
     AUTO = 0
     MANUAL = 1
     STANDBY = 2
+    UNKNOWN = 1000
 
 
+# Disconnecting an idle WalkingPad is disabled by default.
+DEFAULT_IDLE_DISCONNECT_MINUTES: Final = 0
 DEFAULT_PREFERRED_MODE: Final = WalkingPadMode.MANUAL.name.lower()
+# The pace, cadence and moving average speed are computed over the last minute.
+DEFAULT_METRICS_WINDOW_SECONDS: Final = 60
+# The totals are recorded as entity states by default.
+DEFAULT_STATISTICS_IMPORT: Final = False
+DEFAULT_PROFILE_DURATION_SECONDS: Final = 60
+DEFAULT_CAPTURE_DURATION_SECONDS: Final = 3600
+
+# Directories of the configuration directory where the integration writes files.
+CAPTURE_DIRECTORY: Final = "walkingpad/captures"
+PROFILE_DIRECTORY: Final = "walkingpad/profiles"
+SESSIONS_DIRECTORY: Final = "walkingpad/sessions"
+
 PREFERRED_MODE_OPTIONS: Final = [
     WalkingPadMode.AUTO.name.lower(),
     WalkingPadMode.MANUAL.name.lower(),
 ]
 
 
-class WalkingPadStatus(TypedDict):
+class WalkingPadStatus(NamedTuple):
     """A type to represent the state of the WalkingPad at a specific time."""
 
     belt_state: BeltState
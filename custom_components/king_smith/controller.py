@@ -0,0 +1,110 @@
+"""Bluetooth controller for the WalkingPad."""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+
+from bleak import BleakClient, BleakError
+from bleak.backends.device import BLEDevice
+from bleak_retry_connector import BleakClientWithServiceCache, establish_connection
+from ph4_walkingpad.pad import Controller, WalkingPadCurStatus
+
+from .capture import CaptureDirection, WalkingPadCapture
+
+_LOGGER = logging.getLogger(__name__)
+
+NOTIFY_CHARACTERISTIC_UUID = "0000fe01-0000-1000-8000-00805f9b34fb"
+WRITE_CHARACTERISTIC_UUID = "0000fe02-0000-1000-8000-00805f9b34fb"
+
+# First bytes of the status frames notified by the WalkingPad.
+STATUS_FRAME_HEADER = b"\xf8\xa2"
+
+# Connection attempts made by bleak-retry-connector for a single connect call.
+CONNECT_MAX_ATTEMPTS = 2
+
+
+class WalkingPadController(Controller):
+    """A ph4_walkingpad controller with a fast connection setup.
+
+    The connection is established by bleak-retry-connector, which retries the
+    transient errors and reuses the GATT services cached by the bluetooth backend
+    for this address, across reconnections and Home Assistant restarts.
+    Unlike Controller.run, the characteristics are not all read on connection.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ble_device_callback: Callable[[], BLEDevice],
+        disconnected_callback: Callable[[], None],
+    ) -> None:
+        """Create a controller."""
+        super().__init__()
+        self._name = name
+        self._ble_device_callback = ble_device_callback
+        self._disconnected_callback = disconnected_callback
+        self._use_services_cache = True
+        # Records the frames exchanged with the WalkingPad while set.
+        self.capture: WalkingPadCapture | None = None
+
+    def invalidate_services_cache(self) -> None:
+        """Discover the services again on the next connection."""
+        self._use_services_cache = False
+
+    def _on_disconnected(self, client: BleakClient) -> None:
+        if client is self.client:
+            self._disconnected_callback()
+
+    def notif_handler(self, sender, data) -> None:
+        """Handle a notification from the WalkingPad.
+
+        Status frames arrive several times per second while the belt is moving,
+        they are decoded without the message formatting done by
+        Controller.notif_handler for its logs.
+        """
+        if self.capture is not None:
+            self.capture.record(CaptureDirection.NOTIFICATION, data)
+        if data[:2] != STATUS_FRAME_HEADER:
+            super().notif_handler(sender, data)
+            return
+        try:
+            status = WalkingPadCurStatus.from_data(data)
+            self.last_status = status
+            if self.handler_cur_status:
+                self.handler_cur_status(sender, status)
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception(
+                "Error while handling the WalkingPad status %s", data.hex()
+            )
+
+    async def send_cmd(self, cmd):
+        """Send a command frame, and record it while capturing."""
+        if self.capture is not None:
+            self.capture.record(CaptureDirection.COMMAND, self.fix_crc(cmd))
+        return await super().send_cmd(cmd)
+
+    async def run(self, address=None) -> None:
+        """Connect the device and enable the status notifications."""
+        client = await establish_connection(
+            BleakClientWithServiceCache,
+            address or self._ble_device_callback(),
+            self._name,
+            disconnected_callback=self._on_disconnected,
+            max_attempts=CONNECT_MAX_ATTEMPTS,
+            ble_device_callback=self._ble_device_callback,
+            use_services_cache=self._use_services_cache,
+        )
+        self.client = client
+        self.char_fe01 = client.services.get_characteristic(NOTIFY_CHARACTERISTIC_UUID)
+        self.char_fe02 = client.services.get_characteristic(WRITE_CHARACTERISTIC_UUID)
+        if self.char_fe01 is None or self.char_fe02 is None:
+            # The cached services are probably stale.
+            _LOGGER.debug("WalkingPad characteristics not found, clearing the cache")
+            self.invalidate_services_cache()
+            await client.clear_cache()
+            await client.disconnect()
+            raise BleakError("WalkingPad characteristics not found")
+
+        self._use_services_cache = True
+        await client.start_notify(self.char_fe01, self.notif_handler)
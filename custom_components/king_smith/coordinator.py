@@ -2,7 +2,9 @@
 
 import asyncio
 import logging
-from collections.abc import Callable
+import random
+import time
+from collections.abc import Callable, Coroutine
 from datetime import timedelta
 from typing import Any
 
@@ -10,21 +12,55 @@ from homeassistant.core import CALLBACK_TYPE, HassJob, HomeAssistant, callback
 from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
-from .const import DOMAIN, BeltState, WalkingPadMode, WalkingPadStatus
+from .connection import WalkingPadConnectionStatus
+from .const import (
+    DEFAULT_METRICS_WINDOW_SECONDS,
+    DOMAIN,
+    BeltState,
+    WalkingPadMode,
+    WalkingPadStatus,
+)
+from .derived import WalkingPadDerivedMetrics
+from .sequencer import FrameVerdict, WalkingPadStatusSequencer
 from .walkingpad import WalkingPad
 
 _LOGGER = logging.getLogger(__name__)
 
 STATUS_UPDATE_INTERVAL = timedelta(seconds=5)
 
-# The ph4_walkingpad has a 10s timeout in its connect method, you might have trouble if you set a smaller timeout here.
+# The status is polled faster while the belt is moving and slower while idle.
+STATUS_UPDATE_INTERVALS: dict[BeltState, timedelta] = {
+    BeltState.ACTIVE: timedelta(seconds=1),
+    BeltState.STARTING: timedelta(seconds=1),
+    BeltState.STOPPED: STATUS_UPDATE_INTERVAL,
+    BeltState.STANDBY: timedelta(seconds=30),
+}
+
+# Relative jitter applied to the polling interval, so that polls of several devices
+# sharing a bluetooth proxy don't stay in phase.
+STATUS_UPDATE_JITTER = 0.1
+
+# A poll starting later than this after its due time is counted as late.
+STATUS_UPDATE_LATE_THRESHOLD_SECONDS = 1
+
+# Bounds the wait for the status request, which may be queued behind other commands.
 STATUS_UPDATE_TIMEOUT_SECONDS = 11
 
+# The kinds of listeners, as told to the listener profiler.
+ENTITY_LISTENER = "entity"
+STATUS_LISTENER = "status"
+
 
 class WalkingPadCoordinator(DataUpdateCoordinator[WalkingPadStatus]):
     """WalkingPad coordinator."""
 
-    def __init__(self, hass: HomeAssistant, walkingpad_device: WalkingPad) -> None:
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        walkingpad_device: WalkingPad,
+        idle_disconnect_timeout: timedelta | None = None,
+        metrics_window_seconds: int = DEFAULT_METRICS_WINDOW_SECONDS,
+    ) -> None:
         """Initialise WalkingPad coordinator."""
         super().__init__(
             hass,
@@ -35,18 +71,52 @@ class WalkingPadCoordinator(DataUpdateCoordinator[WalkingPadStatus]):
             update_method=None,
         )
         self.walkingpad_device = walkingpad_device
+        self.idle_disconnect_timeout = idle_disconnect_timeout
+        self._idle_since: float | None = None
+        self.skipped_polls = 0
+        self.late_polls = 0
+        self._base_update_interval = STATUS_UPDATE_INTERVAL
+        self._poll_due_time: float | None = None
+        # Status fields changed by the last update, as displayed to the entities
+        # and as reported by the WalkingPad to the status listeners.
+        self._changed_fields: frozenset[str] | None = None
+        self._changed_status_fields: frozenset[str] = frozenset()
+        # Expected status fields of the commands in progress, with their command.
+        self._pending_fields: dict[str, tuple[Any, object]] = {}
+        # Listeners of the status which don't keep the device connected.
+        self._status_listeners: dict[object, tuple[CALLBACK_TYPE, frozenset[str]]] = {}
+        # Calls each listener with its kind instead of the dispatch while profiled.
+        self.listener_profiler: Callable[[str, CALLBACK_TYPE], None] | None = None
+        self.status_sequencer = WalkingPadStatusSequencer()
+        self.derived_metrics = WalkingPadDerivedMetrics(metrics_window_seconds)
         self.walkingpad_device.register_status_callback(self._async_handle_update)
-        self.data = {
-            "belt_state": BeltState.STOPPED,
-            "speed": 0.0,
-            "mode": WalkingPadMode.MANUAL,
-            "session_running_time": 0,
-            "session_distance": 0,
-            "session_steps": 0,
-            "status_timestamp": 0,
-        }
+        self.walkingpad_device.register_connection_callback(
+            self._async_handle_connection_update
+        )
+        self.data = WalkingPadStatus(
+            belt_state=BeltState.STOPPED,
+            speed=0.0,
+            mode=WalkingPadMode.MANUAL,
+            session_running_time=0,
+            session_distance=0,
+            session_steps=0,
+            status_timestamp=0,
+        )
 
     async def _async_update_data(self) -> WalkingPadStatus:
+        if self._poll_due_time is not None:
+            lateness = time.monotonic() - self._poll_due_time
+            if lateness > STATUS_UPDATE_LATE_THRESHOLD_SECONDS:
+                self.late_polls += 1
+                _LOGGER.debug("WalkingPad status poll is %.1fs late", lateness)
+
+        if self.walkingpad_device.busy:
+            # A poll is already in flight or a command holds the link: the status
+            # will be received anyway, don't queue a request that would be stale.
+            self.skipped_polls += 1
+            _LOGGER.debug("WalkingPad is busy, skipping status poll")
+            return self.data
+
         async with asyncio.timeout(STATUS_UPDATE_TIMEOUT_SECONDS):
             await self.walkingpad_device.update_state()
             # We don't know the status yet, it will be transmitted to the _async_handle_update callback.
@@ -58,16 +128,213 @@ class WalkingPadCoordinator(DataUpdateCoordinator[WalkingPadStatus]):
         """Get the device connection status."""
         return self.walkingpad_device.connected
 
+    @property
+    def available(self) -> bool:
+        """Return true if the device is connected or can be reconnected on demand."""
+        return (
+            self.walkingpad_device.connected
+            or self.walkingpad_device.connection_status
+            == WalkingPadConnectionStatus.IDLE
+        )
+
+    @property
+    def status(self) -> WalkingPadStatus:
+        """Return the status to display, including the effect of pending commands."""
+        return self._apply_pending_fields(self.data)
+
+    def _apply_pending_fields(self, status: WalkingPadStatus) -> WalkingPadStatus:
+        if not self._pending_fields:
+            return status
+        return status._replace(
+            **{field: value for field, (value, _) in self._pending_fields.items()}
+        )
+
+    async def async_run_command(
+        self, command: Coroutine[Any, Any, bool], **expected_fields: Any
+    ) -> bool:
+        """Run a command, displaying its expected effect until it completes.
+
+        The WalkingPad commands complete once the WalkingPad reports their effect,
+        or after a timeout: the reported status is then displayed again.
+        A newer command expecting the same fields takes over them.
+        """
+        token = object()
+        self._update_pending_fields(
+            {field: (value, token) for field, value in expected_fields.items()}
+        )
+        try:
+            return await command
+        finally:
+            self._update_pending_fields(
+                {
+                    field: None
+                    for field in expected_fields
+                    if self._pending_fields.get(field, (None, None))[1] is token
+                }
+            )
+
+    @callback
+    def _update_pending_fields(
+        self, pending_fields: dict[str, tuple[Any, object] | None]
+    ) -> None:
+        """Set or clear pending fields, updating the listeners if the display changed."""
+        displayed = self.status
+        for field, pending in pending_fields.items():
+            if pending is None:
+                del self._pending_fields[field]
+            else:
+                self._pending_fields[field] = pending
+        changed_fields = frozenset(
+            field
+            for field, previous, current in zip(
+                WalkingPadStatus._fields, displayed, self.status
+            )
+            if previous != current
+        )
+        if changed_fields:
+            self._changed_fields = changed_fields
+            self.async_update_listeners()
+
     @callback
     def _async_handle_update(self, status: WalkingPadStatus) -> None:
         """Receive status updates from the WalkingPad controller."""
-        if status.get("status_timestamp", 0) > self.data.get("status_timestamp", 0):
-            _LOGGER.debug("WalkingPad status update : %s", status)
-            self.async_set_updated_data(status)
+        verdict = self.status_sequencer.check(status)
+        if verdict == FrameVerdict.OUT_OF_ORDER:
+            return
+        # Duplicates still tell how long the belt has been in its state.
+        self._adapt_update_interval(status.belt_state)
+        self._track_idle_time(status.belt_state)
+        if verdict == FrameVerdict.DUPLICATE:
+            return
+
+        _LOGGER.debug("WalkingPad status update : %s", status)
+        self.derived_metrics.update(status)
+        self._changed_fields = frozenset(
+            field
+            for field, previous, current in zip(
+                WalkingPadStatus._fields,
+                self.status,
+                self._apply_pending_fields(status),
+            )
+            if previous != current
+        )
+        # The status listeners read the reported status: a change already displayed
+        # as the expected effect of a command is still a change for them.
+        self._changed_status_fields = frozenset(
+            field
+            for field, previous, current in zip(
+                WalkingPadStatus._fields, self.data, status
+            )
+            if previous != current
+        )
+        self.async_set_updated_data(status)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update the listeners depending on the status fields that changed.
+
+        The context of a listener is the set of the status fields it depends on,
+        listeners registered without context are always updated. The status
+        listeners are updated when the reported status changed.
+        """
+        changed_fields = self._changed_fields
+        self._changed_fields = None
+        changed_status_fields = self._changed_status_fields
+        self._changed_status_fields = frozenset()
+        profiler = self.listener_profiler
+        for update_callback, context in list(self._listeners.values()):
+            if (
+                changed_fields is None
+                or context is None
+                or not changed_fields.isdisjoint(context)
+            ):
+                if profiler is None:
+                    update_callback()
+                else:
+                    profiler(ENTITY_LISTENER, update_callback)
+        for update_callback, status_fields in list(self._status_listeners.values()):
+            if not changed_status_fields.isdisjoint(status_fields):
+                if profiler is None:
+                    update_callback()
+                else:
+                    profiler(STATUS_LISTENER, update_callback)
+
+    @callback
+    def async_add_status_listener(
+        self, update_callback: CALLBACK_TYPE, status_fields: frozenset[str]
+    ) -> Callable[[], None]:
+        """Listen for changes of the given status fields, without connecting.
+
+        Unlike the listeners of the entities, these listeners don't connect the
+        device nor keep it connected: they receive the statuses reported while
+        the entities or the commands hold the link.
+        """
+        token = object()
+        self._status_listeners[token] = (update_callback, status_fields)
+
+        @callback
+        def remove_listener() -> None:
+            self._status_listeners.pop(token, None)
+
+        return remove_listener
+
+    def _track_idle_time(self, belt_state: BeltState) -> None:
+        """Disconnect the device once it has been idle for too long.
+
+        This frees a connection slot of the bluetooth adapter or proxy.
+        """
+        if belt_state not in (BeltState.STOPPED, BeltState.STANDBY):
+            self._idle_since = None
+            return
+        now = time.monotonic()
+        if self._idle_since is None:
+            self._idle_since = now
+            return
+        if (
+            self.idle_disconnect_timeout
+            and now - self._idle_since >= self.idle_disconnect_timeout.total_seconds()
+            and self.walkingpad_device.connected
+        ):
+            self._idle_since = None
+            self.hass.async_create_task(
+                self.walkingpad_device.suspend(), "Disconnect the idle WalkingPad"
+            )
+
+    def _adapt_update_interval(self, belt_state: BeltState) -> None:
+        """Adapt the polling rate to the belt state.
+
+        The new interval is applied the next time the refresh is scheduled.
+        """
+        update_interval = STATUS_UPDATE_INTERVALS.get(
+            belt_state, STATUS_UPDATE_INTERVAL
+        )
+        if update_interval != self._base_update_interval:
+            _LOGGER.debug(
+                "Belt is %s, polling every %s",
+                belt_state.name.lower(),
+                update_interval,
+            )
+            self._base_update_interval = update_interval
+        self.update_interval = update_interval * random.uniform(
+            1 - STATUS_UPDATE_JITTER, 1 + STATUS_UPDATE_JITTER
+        )
+
+    @callback
+    def _schedule_refresh(self) -> None:
+        """Schedule a refresh and remember when it is due."""
+        super()._schedule_refresh()
+        if self.update_interval is not None:
+            self._poll_due_time = (
+                time.monotonic() + self.update_interval.total_seconds()
+            )
 
     @callback
-    def _async_handle_disconnect(self) -> None:
-        """Trigger the callbacks for disconnected."""
+    def _async_handle_connection_update(
+        self, status: WalkingPadConnectionStatus
+    ) -> None:
+        """Trigger the callbacks when the connection status changes."""
+        if status == WalkingPadConnectionStatus.CONNECTED:
+            self.status_sequencer.reset()
         self.async_update_listeners()
 
     async def _async_connect(self, *_) -> None:
@@ -99,4 +366,5 @@ class WalkingPadCoordinator(DataUpdateCoordinator[WalkingPadStatus]):
             0,
             HassJob(self._async_disconnect, "Disonnect the WalkingPad"),
         )
+        self._poll_due_time = None
         return super()._unschedule_refresh()
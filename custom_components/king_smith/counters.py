@@ -0,0 +1,26 @@
+"""Session counters of the WalkingPad."""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+
+def session_restarted(
+    counters: Sequence[float], last_counters: Sequence[float]
+) -> bool:
+    """Return whether a new session started between two session counters.
+
+    The session counters of the WalkingPad restart from 0 with each session, a
+    new session started when one of them went down.
+    """
+    return any(value < last for value, last in zip(counters, last_counters))
+
+
+def session_progress(
+    counters: Sequence[float], last_counters: Sequence[float]
+) -> tuple[float, ...]:
+    """Return the progress made between two session counters."""
+    if session_restarted(counters, last_counters):
+        # The counters of the new session are its progress.
+        return tuple(counters)
+    return tuple(value - last for value, last in zip(counters, last_counters))
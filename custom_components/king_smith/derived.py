@@ -0,0 +1,86 @@
+"""Metrics derived from the status stream of the WalkingPad."""
+
+from __future__ import annotations
+
+from typing import NamedTuple
+
+from .const import BeltState, WalkingPadStatus
+from .counters import session_restarted
+from .history import RingBuffer
+
+_MOVING_BELT_STATES = (BeltState.ACTIVE, BeltState.STARTING)
+
+
+class DerivedMetrics(NamedTuple):
+    """The metrics derived from the last statuses, None when unknown."""
+
+    pace: float | None  # in minutes per km, over the window
+    cadence: float | None  # in steps per minute, over the window
+    moving_average_speed: float | None  # in km/h, over the window
+    session_average_speed: float | None  # in km/h, since the session start
+
+
+UNKNOWN_METRICS = DerivedMetrics(None, None, None, None)
+
+
+class WalkingPadDerivedMetrics:
+    """Compute the pace, cadence and average speeds in constant time per status.
+
+    The window is measured on the running time reported by the WalkingPad: the
+    pauses of the belt and the time without statuses don't count. The session
+    counters of the first and last statuses of the window are compared, so a
+    dropped status does not change the result. A single status per second of
+    running time is kept, which bounds the buffer to the window length.
+    """
+
+    def __init__(self, window_seconds: int) -> None:
+        """Create the metrics, computed over a window of running time."""
+        self.window_seconds = window_seconds
+        # Running time, distance and steps.
+        self._samples = RingBuffer(window_seconds + 2, "III")
+        self._latest: tuple[int, int, int] | None = None
+        self.metrics = UNKNOWN_METRICS
+
+    def set_window(self, window_seconds: int) -> None:
+        """Change the window, the metrics are computed again from the next status."""
+        if window_seconds != self.window_seconds:
+            self.window_seconds = window_seconds
+            self._samples = RingBuffer(window_seconds + 2, "III")
+            self._latest = None
+            self.metrics = UNKNOWN_METRICS
+
+    def update(self, status: WalkingPadStatus) -> DerivedMetrics:
+        """Add a status to the window and return the updated metrics."""
+        sample = (
+            status.session_running_time,
+            status.session_distance,
+            status.session_steps,
+        )
+        samples = self._samples
+        if self._latest is not None and session_restarted(sample, self._latest):
+            samples.clear()
+        self._latest = sample
+        if not samples or sample[0] > samples[-1][0]:
+            samples.append(*sample)
+        # Keep the last sample at least a window older than the latest one.
+        while len(samples) > 1 and sample[0] - samples[1][0] >= self.window_seconds:
+            samples.popleft()
+
+        running_time, distance, steps = sample
+        session_average_speed = (
+            round(distance / running_time * 3.6, 2) if running_time else None
+        )
+        oldest_time, oldest_distance, oldest_steps = samples[0]
+        span = running_time - oldest_time
+        if status.belt_state not in _MOVING_BELT_STATES or span <= 0:
+            self.metrics = DerivedMetrics(None, None, None, session_average_speed)
+            return self.metrics
+
+        window_distance = distance - oldest_distance
+        self.metrics = DerivedMetrics(
+            round(span / 60 / (window_distance / 1000), 2) if window_distance else None,
+            round((steps - oldest_steps) / span * 60, 1),
+            round(window_distance / span * 3.6, 2),
+            session_average_speed,
+        )
+        return self.metrics
@@ -0,0 +1,152 @@
+"""Diagnostics support for the walkingpad integration."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from . import WalkingPadIntegrationData
+from .connection import WalkingPadConnectionStatus
+from .const import CONF_MAC, DOMAIN, BeltState, WalkingPadMode
+from .session import read_last_sessions
+from .walkingpad import WalkingPad
+
+TO_REDACT = {CONF_MAC, "unique_id"}
+
+# Number of recorded walking sessions included in the diagnostics.
+DIAGNOSTICS_SESSIONS = 10
+
+
+def _isoformat(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, UTC).isoformat()
+
+
+def _enum_name(enum: type[BeltState | WalkingPadMode], value: int) -> str | int:
+    try:
+        return enum(value).name.lower()
+    except ValueError:
+        return value
+
+
+def _history_diagnostics(device: WalkingPad) -> dict[str, Any]:
+    """Return the recent frames, commands and connection changes, oldest first."""
+    history = device.history
+    return {
+        "connections": [
+            {
+                "time": _isoformat(timestamp),
+                "status": WalkingPadConnectionStatus(status).name.lower(),
+            }
+            for timestamp, status in history.connections
+        ],
+        "commands": [
+            {
+                "time": _isoformat(start),
+                "command": history.command_name(int(code)),
+                "duration_ms": round(duration * 1000, 1),
+                "success": bool(success),
+            }
+            for start, code, duration, success in history.commands
+        ],
+        "frames": [
+            {
+                "time": _isoformat(timestamp),
+                "belt_state": _enum_name(BeltState, int(belt_state)),
+                "speed": speed / 10,
+                "mode": _enum_name(WalkingPadMode, int(mode)),
+                "session_running_time": running_time,
+                "session_distance": distance,
+                "session_steps": steps,
+            }
+            for (
+                timestamp,
+                belt_state,
+                speed,
+                mode,
+                running_time,
+                distance,
+                steps,
+            ) in history.frames
+        ],
+    }
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    integration_data: WalkingPadIntegrationData = hass.data[DOMAIN][entry.entry_id]
+    device = integration_data["device"]
+    coordinator = integration_data["coordinator"]
+    sequencer = coordinator.status_sequencer
+    metrics = device.metrics
+    session_recorder = integration_data["session_recorder"]
+    statistics_importer = integration_data["statistics_importer"]
+    sessions = await hass.async_add_executor_job(
+        read_last_sessions, session_recorder.path, DIAGNOSTICS_SESSIONS
+    )
+
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "connection": {
+            "status": device.connection_status.name.lower(),
+            "connected_since": (
+                device.connected_since.isoformat() if device.connected_since else None
+            ),
+            "reconnects": device.reconnects,
+            "connection_failures": device.connection_failures,
+        },
+        "coordinator": {
+            "status": {
+                **coordinator.data._asdict(),
+                "belt_state": coordinator.data.belt_state.name.lower(),
+                "mode": coordinator.data.mode.name.lower(),
+            },
+            "update_interval": (
+                coordinator.update_interval.total_seconds()
+                if coordinator.update_interval
+                else None
+            ),
+            "skipped_polls": coordinator.skipped_polls,
+            "late_polls": coordinator.late_polls,
+            "accepted_frames": sequencer.accepted_frames,
+            "duplicate_frames": sequencer.duplicate_frames,
+            "out_of_order_frames": sequencer.out_of_order_frames,
+            "clock_resets": sequencer.clock_resets,
+            "coalesced_commands": device.coalesced_commands,
+            "derived_metrics": coordinator.derived_metrics.metrics._asdict(),
+        },
+        "latency": {
+            "commands": {
+                name: {
+                    **command.latency.percentiles_ms(),
+                    "successes": command.successes,
+                    "failures": command.failures,
+                }
+                for name, command in metrics.commands.items()
+            },
+            "notification_interval": metrics.notification_intervals.percentiles_ms(),
+        },
+        "history": _history_diagnostics(device),
+        "sessions": {
+            "recorded_sessions": session_recorder.recorded_sessions,
+            "recorded_samples": session_recorder.recorded_samples,
+            "last_sessions": [
+                {**session._asdict(), "start": _isoformat(session.start)}
+                for session in sessions
+            ],
+        },
+        "odometer": integration_data["odometer"].totals._asdict(),
+        "statistics": (
+            {
+                "statistic_ids": list(statistics_importer.statistic_ids),
+                "imported_rows": statistics_importer.imported_rows,
+            }
+            if statistics_importer is not None
+            else None
+        ),
+    }
@@ -0,0 +1,110 @@
+"""Recent history of the WalkingPad link, kept for the diagnostics."""
+
+from __future__ import annotations
+
+import time
+from array import array
+from collections.abc import Iterator, Sequence
+
+from .connection import WalkingPadConnectionStatus
+from .const import WalkingPadStatus
+
+FRAME_HISTORY_SIZE = 4096
+COMMAND_HISTORY_SIZE = 1024
+CONNECTION_HISTORY_SIZE = 64
+
+
+class RingBuffer:
+    """A fixed-size buffer of records, stored column by column in arrays.
+
+    Appending a record overwrites the oldest one once the buffer is full, the
+    memory used does not depend on the number of records appended.
+    """
+
+    __slots__ = ("_capacity", "_columns", "_next", "_size")
+
+    def __init__(self, capacity: int, typecodes: Sequence[str]) -> None:
+        """Create a buffer of records with one field per array typecode."""
+        self._capacity = capacity
+        self._columns = tuple(array(typecode, [0]) * capacity for typecode in typecodes)
+        self._next = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        """Return the number of records in the buffer."""
+        return self._size
+
+    def append(self, *values: float) -> None:
+        """Append a record, its values in the order of the typecodes."""
+        index = self._next
+        for column, value in zip(self._columns, values):
+            column[index] = value
+        self._next = (index + 1) % self._capacity
+        if self._size < self._capacity:
+            self._size += 1
+
+    def popleft(self) -> None:
+        """Drop the oldest record."""
+        if self._size:
+            self._size -= 1
+
+    def clear(self) -> None:
+        """Drop all the records."""
+        self._size = 0
+
+    def __getitem__(self, index: int) -> tuple[float, ...]:
+        """Return a record, 0 is the oldest and -1 the newest."""
+        if not -self._size <= index < self._size:
+            raise IndexError("ring buffer index out of range")
+        index = (self._next - self._size + index % self._size) % self._capacity
+        return tuple(column[index] for column in self._columns)
+
+    def __iter__(self) -> Iterator[tuple[float, ...]]:
+        """Iterate over the records, from the oldest to the newest."""
+        start = (self._next - self._size) % self._capacity
+        for offset in range(self._size):
+            index = (start + offset) % self._capacity
+            yield tuple(column[index] for column in self._columns)
+
+
+class WalkingPadHistory:
+    """The last status frames, commands and connection changes of a WalkingPad."""
+
+    def __init__(self) -> None:
+        """Create an empty history."""
+        # Timestamp, belt state, speed in tenths of km/h, mode, running time,
+        # distance and steps.
+        self.frames = RingBuffer(FRAME_HISTORY_SIZE, "dHHHIII")
+        # Timestamp, command code, duration and success.
+        self.commands = RingBuffer(COMMAND_HISTORY_SIZE, "dBfB")
+        # Timestamp and connection status.
+        self.connections = RingBuffer(CONNECTION_HISTORY_SIZE, "dB")
+        self._command_codes: dict[str, int] = {}
+        self._command_names: list[str] = []
+
+    def record_frame(self, status: WalkingPadStatus) -> None:
+        """Record a decoded status frame."""
+        self.frames.append(
+            status.status_timestamp,
+            status.belt_state.value,
+            round(status.speed * 10),
+            status.mode.value,
+            status.session_running_time,
+            status.session_distance,
+            status.session_steps,
+        )
+
+    def record_command(self, name: str, start: float, duration: float, success: bool):
+        """Record a command sent to the WalkingPad, started at a wall clock time."""
+        if (code := self._command_codes.get(name)) is None:
+            code = self._command_codes[name] = len(self._command_names)
+            self._command_names.append(name)
+        self.commands.append(start, code, duration, success)
+
+    def record_connection(self, status: WalkingPadConnectionStatus) -> None:
+        """Record a connection status change."""
+        self.connections.append(time.time(), status.value)
+
+    def command_name(self, code: int) -> str:
+        """Return the name of a recorded command code."""
+        return self._command_names[code]
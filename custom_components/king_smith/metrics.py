@@ -0,0 +1,108 @@
+"""Latency and reliability metrics of the WalkingPad link."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+
+# Upper bounds of the histogram buckets, in seconds: from 1ms to about 90s, each
+# bucket 19% wider than the previous one.
+HISTOGRAM_BUCKETS: tuple[float, ...] = tuple(0.001 * 2 ** (i / 4) for i in range(67))
+
+REPORTED_PERCENTILES = (50, 95, 99)
+
+
+class LatencyHistogram:
+    """A histogram of durations with fixed buckets, its size does not grow."""
+
+    __slots__ = ("_percentiles_ms", "counts", "total")
+
+    def __init__(self) -> None:
+        """Create an empty histogram."""
+        # The last bucket counts the durations above the largest bound.
+        self.counts = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        self.total = 0
+        # The reported percentiles, computed on demand until the next record.
+        self._percentiles_ms: dict[str, float | None] | None = None
+
+    def record(self, duration: float) -> None:
+        """Record a duration, in seconds."""
+        self.counts[bisect_left(HISTOGRAM_BUCKETS, duration)] += 1
+        self.total += 1
+        self._percentiles_ms = None
+
+    def percentile(self, percentile: float) -> float | None:
+        """Return the upper bound of the bucket holding the given percentile.
+
+        Return None if no duration has been recorded.
+        """
+        if not self.total:
+            return None
+        rank = percentile / 100 * self.total
+        cumulative = 0
+        for bound, count in zip(HISTOGRAM_BUCKETS, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        # The percentile is above the largest bound.
+        return HISTOGRAM_BUCKETS[-1]
+
+    def percentiles_ms(self) -> dict[str, float | None]:
+        """Return the reported percentiles, in milliseconds."""
+        if self._percentiles_ms is None:
+            self._percentiles_ms = {}
+            for percentile in REPORTED_PERCENTILES:
+                value = self.percentile(percentile)
+                self._percentiles_ms[f"p{percentile}"] = (
+                    None if value is None else round(value * 1000, 1)
+                )
+        return dict(self._percentiles_ms)
+
+
+class CommandMetrics:
+    """Latency and outcome of the calls of a command."""
+
+    __slots__ = ("failures", "latency", "successes")
+
+    def __init__(self) -> None:
+        """Create empty command metrics."""
+        self.latency = LatencyHistogram()
+        self.successes = 0
+        self.failures = 0
+
+    def record(self, duration: float, success: bool) -> None:
+        """Record a call of the command."""
+        self.latency.record(duration)
+        if success:
+            self.successes += 1
+        else:
+            self.failures += 1
+
+
+class WalkingPadMetrics:
+    """Metrics of the commands sent to a WalkingPad and of its notifications."""
+
+    def __init__(self) -> None:
+        """Create empty metrics."""
+        self.commands: dict[str, CommandMetrics] = {}
+        self.notification_intervals = LatencyHistogram()
+        self._last_notification: float | None = None
+
+    def command(self, name: str) -> CommandMetrics:
+        """Return the metrics of a command."""
+        if (metrics := self.commands.get(name)) is None:
+            metrics = self.commands[name] = CommandMetrics()
+        return metrics
+
+    def record_command(self, name: str, duration: float, success: bool) -> None:
+        """Record a call of a command, its duration is in seconds."""
+        self.command(name).record(duration, success)
+
+    def record_notification(self, timestamp: float) -> None:
+        """Record the reception of a notification, at a monotonic timestamp."""
+        if self._last_notification is not None:
+            self.notification_intervals.record(timestamp - self._last_notification)
+        self._last_notification = timestamp
+
+    def reset_notification_interval(self) -> None:
+        """Don't count the time without link as a notification interval."""
+        self._last_notification = None
@@ -63,22 +63,24 @@ class WalkingPadSpeedNumberEntity(
 
     def __init__(self, coordinator: WalkingPadCoordinator) -> None:
         """Initialize the speed number."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, frozenset({"speed"}))
         self._attr_unique_id = f"{coordinator.walkingpad_device.mac}-{NUMBER_KEY}"
 
     @property
     def native_value(self) -> float:
         """Return the current speed."""
-        return self.coordinator.data.get("speed", 0.0)
+        return self.coordinator.status.speed
 
     async def async_set_native_value(self, value: float) -> None:
         """Set the speed."""
-        belt_state = self.coordinator.data.get("belt_state")
+        belt_state = self.coordinator.status.belt_state
         if belt_state not in [BeltState.ACTIVE, BeltState.STARTING]:
             return
-        await self.coordinator.walkingpad_device.set_speed(value)
+        await self.coordinator.async_run_command(
+            self.coordinator.walkingpad_device.set_speed(value), speed=value
+        )
 
     @property
     def available(self) -> bool:
         """Return if entity is available."""
-        return self.coordinator.connected
+        return self.coordinator.available
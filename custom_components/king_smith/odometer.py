@@ -0,0 +1,143 @@
+"""Lifetime totals of the WalkingPad, kept across sessions and restarts."""
+
+from __future__ import annotations
+
+from typing import Any, NamedTuple
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, WalkingPadStatus
+from .coordinator import WalkingPadCoordinator
+from .counters import session_progress
+
+ODOMETER_STORAGE_VERSION = 1
+
+# The totals are written to the disk at most once per delay, however often the
+# WalkingPad reports its progress.
+ODOMETER_SAVE_DELAY_SECONDS = 60
+
+# The status fields the totals are computed from.
+ODOMETER_STATUS_FIELDS = frozenset(
+    {"session_distance", "session_steps", "session_running_time"}
+)
+
+
+class OdometerTotals(NamedTuple):
+    """The totals walked on a WalkingPad."""
+
+    distance: int  # in meters
+    steps: int
+    running_time: int  # in seconds
+
+
+def _session_counters(status: WalkingPadStatus) -> OdometerTotals:
+    return OdometerTotals(
+        status.session_distance, status.session_steps, status.session_running_time
+    )
+
+
+class WalkingPadOdometer:
+    """Sum the session counters of a WalkingPad into lifetime totals.
+
+    The totals grow by the progress between two statuses, a new session counting
+    from 0. The last session counters are stored with the totals, so the
+    progress made while Home Assistant was stopped is counted if the session
+    went on.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator: WalkingPadCoordinator) -> None:
+        """Create the odometer of a WalkingPad."""
+        self.coordinator = coordinator
+        address = coordinator.walkingpad_device.mac.replace(":", "").lower()
+        self._store: Store[dict[str, Any]] = Store(
+            hass, ODOMETER_STORAGE_VERSION, f"{DOMAIN}.{address}_odometer"
+        )
+        self._totals = OdometerTotals(0, 0, 0)
+        self._last_counters: OdometerTotals | None = None
+        self._last_status: WalkingPadStatus | None = None
+        self._save_pending = False
+        self._unsubscribe: CALLBACK_TYPE | None = None
+        self._listeners: list[CALLBACK_TYPE] = []
+
+    async def async_load(self) -> None:
+        """Read the stored totals."""
+        if (data := await self._store.async_load()) is None:
+            return
+        self._totals = OdometerTotals(*data["totals"])
+        if data.get("last_counters") is not None:
+            self._last_counters = OdometerTotals(*data["last_counters"])
+
+    @callback
+    def async_start(self) -> None:
+        """Start counting the progress reported by the WalkingPad."""
+        self._unsubscribe = self.coordinator.async_add_status_listener(
+            self.async_update, ODOMETER_STATUS_FIELDS
+        )
+
+    async def async_stop(self) -> None:
+        """Stop counting and write the pending totals."""
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+        if self._save_pending:
+            await self._store.async_save(self._data_to_save())
+
+    @property
+    def totals(self) -> OdometerTotals:
+        """Return the totals."""
+        return self._totals
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Listen for changes of the totals."""
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def async_update(self) -> None:
+        """Add the progress since the previous status to the totals."""
+        status = self.coordinator.data
+        if status is self._last_status:
+            return
+        self._last_status = status
+        if not status.status_timestamp:
+            # Not reported by the WalkingPad yet.
+            return
+
+        counters = _session_counters(status)
+        last_counters, self._last_counters = self._last_counters, counters
+        if last_counters is None or counters == last_counters:
+            return
+        self._totals = OdometerTotals(
+            *(
+                total + value
+                for total, value in zip(
+                    self._totals, session_progress(counters, last_counters)
+                )
+            )
+        )
+        for update_callback in list(self._listeners):
+            update_callback()
+
+        if not self._save_pending:
+            # Later progress is written along, when the delay expires.
+            self._save_pending = True
+            self._store.async_delay_save(
+                self._data_to_save, ODOMETER_SAVE_DELAY_SECONDS
+            )
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        self._save_pending = False
+        return {
+            "totals": list(self._totals),
+            "last_counters": (
+                list(self._last_counters) if self._last_counters is not None else None
+            ),
+        }
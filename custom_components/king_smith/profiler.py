@@ -0,0 +1,217 @@
+"""On-demand timing of the integration hot paths."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import functools
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from contextvars import ContextVar
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE
+
+from .coordinator import STATUS_LISTENER, WalkingPadCoordinator
+from .walkingpad import WalkingPad
+
+_LOGGER = logging.getLogger(__name__)
+
+# The bluetooth controller methods timed while profiling.
+PROFILED_BLE_CALLS = (
+    "run",
+    "disconnect",
+    "ask_stats",
+    "start_belt",
+    "stop_belt",
+    "change_speed",
+    "switch_mode",
+)
+
+# Period of the probe measuring how late the event loop runs its callbacks.
+LOOP_LAG_PROBE_INTERVAL_SECONDS = 0.05
+
+# Set while a bluetooth call is timed: the calls it makes, like the change_speed
+# of stop_belt, are part of it and not timed again.
+_timing_ble_call: ContextVar[bool] = ContextVar("timing_ble_call", default=False)
+
+
+class _HotPathStats:
+    """Call count, cumulative and worst duration of a hot path."""
+
+    __slots__ = ("calls", "total", "worst")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.total = 0.0
+        self.worst = 0.0
+
+    def record(self, duration: float) -> None:
+        self.calls += 1
+        self.total += duration
+        if duration > self.worst:
+            self.worst = duration
+
+
+class HotPathProfiler:
+    """Time the hot paths of WalkingPad devices for a limited time.
+
+    The hot paths are wrapped when the profiling starts and restored when it
+    stops, there is no overhead outside of a profiling session.
+    Synchronous hot paths run on the event loop: their duration is the time they
+    block it. The bluetooth calls are awaited, their duration includes the wait.
+    """
+
+    def __init__(self) -> None:
+        """Create a profiler."""
+        self._stats: dict[str, _HotPathStats] = {}
+        self._restore: list[Callable[[], None]] = []
+
+    def _stats_for(self, name: str) -> _HotPathStats:
+        if (stats := self._stats.get(name)) is None:
+            stats = self._stats[name] = _HotPathStats()
+        return stats
+
+    def _timed(self, name: str, function: Callable[..., Any]) -> Callable[..., Any]:
+        stats = self._stats_for(name)
+
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stats.record(time.perf_counter() - start)
+
+        return wrapper
+
+    def _timed_ble_call(
+        self, name: str, function: Callable[..., Awaitable[Any]]
+    ) -> Callable[..., Awaitable[Any]]:
+        stats = self._stats_for(name)
+
+        @functools.wraps(function)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _timing_ble_call.get():
+                return await function(*args, **kwargs)
+            token = _timing_ble_call.set(True)
+            start = time.perf_counter()
+            try:
+                return await function(*args, **kwargs)
+            finally:
+                stats.record(time.perf_counter() - start)
+                _timing_ble_call.reset(token)
+
+        return wrapper
+
+    def _time_listener(self, kind: str, update_callback: CALLBACK_TYPE) -> None:
+        """Time a listener called by the coordinator dispatch.
+
+        The entity updates include their state writes, the status listeners are
+        timed by owner.
+        """
+        name = "entity_state_write"
+        if kind == STATUS_LISTENER:
+            owner = getattr(update_callback, "__self__", update_callback)
+            name = f"status_{type(owner).__name__.removeprefix('WalkingPad')}"
+        start = time.perf_counter()
+        try:
+            update_callback()
+        finally:
+            self._stats_for(name).record(time.perf_counter() - start)
+
+    def _patch(self, obj: Any, attribute: str, wrapper: Callable[..., Any]) -> None:
+        """Replace an attribute of an object until the profiling stops."""
+        if attribute in vars(obj):
+            original = vars(obj)[attribute]
+            self._restore.append(lambda: setattr(obj, attribute, original))
+        else:
+            # A method of the class, shadowed by an instance attribute.
+            self._restore.append(lambda: delattr(obj, attribute))
+        setattr(obj, attribute, wrapper)
+
+    def start(self, devices: list[tuple[WalkingPad, WalkingPadCoordinator]]) -> None:
+        """Start timing the hot paths of the given devices."""
+        for device, coordinator in devices:
+            controller = device.controller
+            if controller.handler_cur_status is not None:
+                self._patch(
+                    controller,
+                    "handler_cur_status",
+                    self._timed("status_update", controller.handler_cur_status),
+                )
+            self._patch(
+                coordinator,
+                "async_update_listeners",
+                self._timed("coordinator_dispatch", coordinator.async_update_listeners),
+            )
+            self._patch(coordinator, "listener_profiler", self._time_listener)
+            for call in PROFILED_BLE_CALLS:
+                self._patch(
+                    controller,
+                    call,
+                    self._timed_ble_call(f"ble_{call}", getattr(controller, call)),
+                )
+
+    def stop(self) -> None:
+        """Restore the hot paths."""
+        while self._restore:
+            self._restore.pop()()
+
+    async def _probe_loop_lag(self) -> None:
+        """Measure how late the event loop wakes up a sleeping task."""
+        stats = self._stats_for("event_loop_lag")
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(LOOP_LAG_PROBE_INTERVAL_SECONDS)
+            stats.record(
+                max(0.0, loop.time() - start - LOOP_LAG_PROBE_INTERVAL_SECONDS)
+            )
+
+    async def async_profile(
+        self,
+        devices: list[tuple[WalkingPad, WalkingPadCoordinator]],
+        duration: float,
+    ) -> dict[str, dict[str, float]]:
+        """Time the hot paths for the given duration and return the summary."""
+        self.start(devices)
+        probe = asyncio.get_running_loop().create_task(
+            self._probe_loop_lag(), name="WalkingPad profiler event loop probe"
+        )
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            probe.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await probe
+            self.stop()
+        return self.summary()
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Return the call count, the cumulative and worst durations in ms."""
+        return {
+            name: {
+                "calls": stats.calls,
+                "total_ms": round(stats.total * 1000, 3),
+                "mean_ms": round(stats.total * 1000 / stats.calls, 3)
+                if stats.calls
+                else 0.0,
+                "worst_ms": round(stats.worst * 1000, 3),
+            }
+            for name, stats in self._stats.items()
+        }
+
+
+def format_summary(summary: dict[str, dict[str, float]]) -> str:
+    """Format a profiling summary as a table."""
+    lines = [
+        f"{'hot path':<24} {'calls':>8} {'total ms':>12} {'mean ms':>10} {'worst ms':>10}"
+    ]
+    lines.extend(
+        f"{name:<24} {stats['calls']:>8} {stats['total_ms']:>12.3f}"
+        f" {stats['mean_ms']:>10.3f} {stats['worst_ms']:>10.3f}"
+        for name, stats in summary.items()
+    )
+    return "\n".join(lines)
@@ -0,0 +1,162 @@
+"""Command scheduler for the WalkingPad."""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from enum import IntEnum, unique
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+# Minimal delay between two commands sent to the WalkingPad.
+DEFAULT_COMMAND_SPACING_SECONDS = 0.75
+
+
+@unique
+class CommandPriority(IntEnum):
+    """An enumeration of the command priorities, lower values are sent first."""
+
+    STOP = 0
+    CONTROL = 1
+    STATUS = 2
+
+
+@dataclass(order=True)
+class _ScheduledCommand:
+    """A command waiting in the scheduler queue."""
+
+    priority: CommandPriority
+    sequence: int
+    name: str = field(compare=False)
+    command: Callable[[], Awaitable[Any]] = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    coalesce_key: str | None = field(default=None, compare=False)
+
+
+class WalkingPadCommandScheduler:
+    """Serialize the commands sent to a WalkingPad through a single worker task."""
+
+    def __init__(
+        self, command_spacing: float = DEFAULT_COMMAND_SPACING_SECONDS
+    ) -> None:
+        """Create a command scheduler."""
+        self.command_spacing = command_spacing
+        self._queue: asyncio.PriorityQueue[_ScheduledCommand] = asyncio.PriorityQueue()
+        self._sequence = itertools.count()
+        self._worker: asyncio.Task | None = None
+        self._last_command_end = 0.0
+        self._current: _ScheduledCommand | None = None
+        self._pending_by_key: dict[str, _ScheduledCommand] = {}
+        self.sent_commands = 0
+        self.failed_commands = 0
+        self.coalesced_commands = 0
+
+    @property
+    def busy(self) -> bool:
+        """Return true if a command is running or waiting to be sent."""
+        return self._current is not None or not self._queue.empty()
+
+    @property
+    def current_command(self) -> str | None:
+        """Name of the command currently holding the link."""
+        return self._current.name if self._current is not None else None
+
+    async def submit(
+        self,
+        priority: CommandPriority,
+        name: str,
+        command: Callable[[], Awaitable[Any]],
+        coalesce_key: str | None = None,
+        supersedes: str | None = None,
+    ) -> Any:
+        """Queue a command and wait for its result.
+
+        Commands sharing a coalesce key are merged while they wait in the queue:
+        only the latest one is sent, the superseded ones return None. The latest
+        one is queued after the commands submitted before it, so that the requests
+        reach the WalkingPad in the order they were made. A command can also
+        supersede the waiting command of another coalesce key.
+        """
+        future = asyncio.get_running_loop().create_future()
+        for key in (coalesce_key, supersedes):
+            pending = self._pending_by_key.get(key) if key else None
+            if pending is not None and not pending.future.done():
+                # The worker skips the superseded command.
+                pending.future.set_result(None)
+                self.coalesced_commands += 1
+        scheduled = _ScheduledCommand(
+            priority, next(self._sequence), name, command, future, coalesce_key
+        )
+        if coalesce_key:
+            self._pending_by_key[coalesce_key] = scheduled
+        self._queue.put_nowait(scheduled)
+        self._ensure_worker()
+        return await future
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(
+                self._run(), name="WalkingPad command scheduler"
+            )
+
+    async def _run(self) -> None:
+        while True:
+            scheduled = await self._queue.get()
+            if scheduled.future.done():
+                # The caller is no longer waiting for this command.
+                self._forget_pending(scheduled)
+                continue
+
+            delay = self._last_command_end + self.command_spacing - time.monotonic()
+            if delay > 0:
+                # Put the command back so that a more urgent one queued while
+                # we wait can still be sent first.
+                self._queue.put_nowait(scheduled)
+                await asyncio.sleep(delay)
+                continue
+
+            self._forget_pending(scheduled)
+            self._current = scheduled
+            try:
+                result = await scheduled.command()
+            except Exception as err:  # pylint: disable=broad-except
+                _LOGGER.debug("WalkingPad command %s failed : %s", scheduled.name, err)
+                self.failed_commands += 1
+                if not scheduled.future.done():
+                    scheduled.future.set_exception(err)
+            else:
+                self.sent_commands += 1
+                if not scheduled.future.done():
+                    scheduled.future.set_result(result)
+            finally:
+                self._current = None
+                self._last_command_end = time.monotonic()
+
+    def _forget_pending(self, scheduled: _ScheduledCommand) -> None:
+        """Stop merging new commands into a command leaving the queue."""
+        if (
+            scheduled.coalesce_key
+            and self._pending_by_key.get(scheduled.coalesce_key) is scheduled
+        ):
+            del self._pending_by_key[scheduled.coalesce_key]
+
+    def shutdown(self) -> None:
+        """Stop the worker and cancel all the pending commands."""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        if self._current is not None:
+            # The worker is cancelled before it could resolve the running command.
+            if not self._current.future.done():
+                self._current.future.cancel()
+            self._current = None
+        self._pending_by_key.clear()
+        while not self._queue.empty():
+            scheduled = self._queue.get_nowait()
+            if not scheduled.future.done():
+                scheduled.future.cancel()
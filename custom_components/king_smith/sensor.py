@@ -3,7 +3,9 @@
 from __future__ import annotations
 
 from collections.abc import Callable
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from typing import Any
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
@@ -12,15 +14,29 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfLength, UnitOfSpeed, UnitOfTime
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    EntityCategory,
+    UnitOfLength,
+    UnitOfSpeed,
+    UnitOfTime,
+)
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.helpers.typing import StateType
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from . import WalkingPadIntegrationData
+from .connection import WalkingPadConnectionStatus
 from .const import DOMAIN, BeltState, WalkingPadMode, WalkingPadStatus
 from .coordinator import WalkingPadCoordinator
+from .derived import DerivedMetrics
+from .odometer import OdometerTotals, WalkingPadOdometer
+from .walkingpad import WalkingPad
+
+# The sensors of the link metrics are updated at this interval rather than on
+# each status: the metrics change with each notification.
+METRICS_UPDATE_INTERVAL = timedelta(seconds=30)
 
 
 @dataclass(kw_only=True)
@@ -28,6 +44,62 @@ class WalkingPadSensorEntityDescription(SensorEntityDescription):
     """Describes Example sensor entity."""
 
     value_fn: Callable[[WalkingPadStatus], StateType]
+    # The status fields the value is computed from.
+    status_fields: frozenset[str]
+    # Only write the value while the belt is stopped, at the end of each session.
+    session_totals: bool = False
+
+
+@dataclass(kw_only=True)
+class WalkingPadDerivedSensorEntityDescription(SensorEntityDescription):
+    """Describes a sensor of a metric derived from the WalkingPad statuses."""
+
+    value_fn: Callable[[DerivedMetrics], StateType]
+
+
+@dataclass(kw_only=True)
+class WalkingPadOdometerSensorEntityDescription(SensorEntityDescription):
+    """Describes a WalkingPad lifetime total sensor entity."""
+
+    value_fn: Callable[[OdometerTotals], StateType]
+
+
+@dataclass(kw_only=True)
+class WalkingPadDiagnosticSensorEntityDescription(SensorEntityDescription):
+    """Describes a WalkingPad diagnostic sensor entity."""
+
+    value_fn: Callable[[WalkingPad], StateType | datetime]
+    attributes_fn: Callable[[WalkingPad], dict[str, Any]] | None = None
+    # The status fields triggering an update, by default only connection changes
+    # do. None to update on every status.
+    status_fields: frozenset[str] | None = frozenset()
+    # Update the sensor at this interval too, None to not.
+    update_interval: timedelta | None = None
+
+
+def _latency_sensor(command: str) -> WalkingPadDiagnosticSensorEntityDescription:
+    """Describe the sensor of the latency of a command sent to the WalkingPad."""
+    return WalkingPadDiagnosticSensorEntityDescription(
+        device_class=SensorDeviceClass.DURATION,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        icon="mdi:timer-sand",
+        key=f"walkingpad_{command}_latency",
+        name=None,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        translation_key=f"walkingpad_{command}_latency",
+        update_interval=METRICS_UPDATE_INTERVAL,
+        value_fn=lambda device: device.metrics.command(
+            command
+        ).latency.percentiles_ms()["p50"],
+        attributes_fn=lambda device: {
+            **device.metrics.command(command).latency.percentiles_ms(),
+            "successes": device.metrics.command(command).successes,
+            "failures": device.metrics.command(command).failures,
+        },
+    )
 
 
 SENSORS: tuple[WalkingPadSensorEntityDescription, ...] = (
@@ -40,7 +112,8 @@ SENSORS: tuple[WalkingPadSensorEntityDescription, ...] = (
         state_class=SensorStateClass.TOTAL_INCREASING,
         suggested_display_precision=2,
         translation_key="walkingpad_distance",
-        value_fn=lambda status: status.get("session_distance", 0.0) / 1000,
+        status_fields=frozenset({"session_distance"}),
+        value_fn=lambda status: status.session_distance / 1000,
     ),
     WalkingPadSensorEntityDescription(
         icon="mdi:shoe-print",
@@ -50,7 +123,8 @@ SENSORS: tuple[WalkingPadSensorEntityDescription, ...] = (
         state_class=SensorStateClass.TOTAL_INCREASING,
         suggested_display_precision=0,
         translation_key="walkingpad_steps",
-        value_fn=lambda status: status.get("session_steps", 0),
+        status_fields=frozenset({"session_steps"}),
+        value_fn=lambda status: status.session_steps,
     ),
     WalkingPadSensorEntityDescription(
         icon="mdi:timer",
@@ -60,7 +134,8 @@ SENSORS: tuple[WalkingPadSensorEntityDescription, ...] = (
         state_class=SensorStateClass.TOTAL_INCREASING,
         suggested_display_precision=0,
         translation_key="walkingpad_duration_minutes",
-        value_fn=lambda status: round(status.get("session_running_time", 0) / 60, 1),
+        status_fields=frozenset({"session_running_time"}),
+        value_fn=lambda status: round(status.session_running_time / 60, 1),
     ),
     WalkingPadSensorEntityDescription(
         icon="mdi:timer",
@@ -70,7 +145,8 @@ SENSORS: tuple[WalkingPadSensorEntityDescription, ...] = (
         state_class=SensorStateClass.TOTAL_INCREASING,
         suggested_display_precision=1,
         translation_key="walkingpad_duration_hours",
-        value_fn=lambda status: round(status.get("session_running_time", 0) / 3600, 4),
+        status_fields=frozenset({"session_running_time"}),
+        value_fn=lambda status: round(status.session_running_time / 3600, 4),
     ),
     WalkingPadSensorEntityDescription(
         icon="mdi:timer",
@@ -80,7 +156,8 @@ SENSORS: tuple[WalkingPadSensorEntityDescription, ...] = (
         state_class=SensorStateClass.TOTAL_INCREASING,
         suggested_display_precision=1,
         translation_key="walkingpad_duration_days",
-        value_fn=lambda status: round(status.get("session_running_time", 0) / 86400, 6),
+        status_fields=frozenset({"session_running_time"}),
+        value_fn=lambda status: round(status.session_running_time / 86400, 6),
     ),
     WalkingPadSensorEntityDescription(
         device_class=SensorDeviceClass.SPEED,
@@ -91,7 +168,8 @@ SENSORS: tuple[WalkingPadSensorEntityDescription, ...] = (
         state_class=SensorStateClass.MEASUREMENT,
         suggested_display_precision=1,
         translation_key="walkingpad_current_speed",
-        value_fn=lambda status: status.get("speed", 0.0),
+        status_fields=frozenset({"speed"}),
+        value_fn=lambda status: status.speed,
     ),
     WalkingPadSensorEntityDescription(
         device_class=SensorDeviceClass.ENUM,
@@ -100,9 +178,8 @@ SENSORS: tuple[WalkingPadSensorEntityDescription, ...] = (
         name=None,
         options=[e.name.lower() for e in BeltState],
         translation_key="walkingpad_state",
-        value_fn=lambda status: status.get(
-            "belt_state", BeltState.UNKNOWN
-        ).name.lower(),
+        status_fields=frozenset({"belt_state"}),
+        value_fn=lambda status: status.belt_state.name.lower(),
     ),
     WalkingPadSensorEntityDescription(
         device_class=SensorDeviceClass.ENUM,
@@ -111,7 +188,161 @@ SENSORS: tuple[WalkingPadSensorEntityDescription, ...] = (
         name=None,
         options=[e.name.lower() for e in WalkingPadMode],
         translation_key="walkingpad_mode",
-        value_fn=lambda status: status.get("mode", WalkingPadMode.MANUAL).name.lower(),
+        status_fields=frozenset({"mode"}),
+        value_fn=lambda status: status.mode.name.lower(),
+    ),
+)
+
+
+# The status fields the derived metrics are computed from.
+DERIVED_STATUS_FIELDS = frozenset(
+    {"belt_state", "session_distance", "session_steps", "session_running_time"}
+)
+
+DERIVED_SENSORS: tuple[WalkingPadDerivedSensorEntityDescription, ...] = (
+    WalkingPadDerivedSensorEntityDescription(
+        icon="mdi:timer-outline",
+        key="walkingpad_pace",
+        name=None,
+        native_unit_of_measurement="min/km",
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+        translation_key="walkingpad_pace",
+        value_fn=lambda metrics: metrics.pace,
+    ),
+    WalkingPadDerivedSensorEntityDescription(
+        icon="mdi:shoe-print",
+        key="walkingpad_cadence",
+        name=None,
+        native_unit_of_measurement="steps/min",
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        translation_key="walkingpad_cadence",
+        value_fn=lambda metrics: metrics.cadence,
+    ),
+    WalkingPadDerivedSensorEntityDescription(
+        device_class=SensorDeviceClass.SPEED,
+        icon="mdi:speedometer-medium",
+        key="walkingpad_moving_average_speed",
+        name=None,
+        native_unit_of_measurement=UnitOfSpeed.KILOMETERS_PER_HOUR,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+        translation_key="walkingpad_moving_average_speed",
+        value_fn=lambda metrics: metrics.moving_average_speed,
+    ),
+    WalkingPadDerivedSensorEntityDescription(
+        device_class=SensorDeviceClass.SPEED,
+        icon="mdi:speedometer-medium",
+        key="walkingpad_session_average_speed",
+        name=None,
+        native_unit_of_measurement=UnitOfSpeed.KILOMETERS_PER_HOUR,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+        translation_key="walkingpad_session_average_speed",
+        value_fn=lambda metrics: metrics.session_average_speed,
+    ),
+)
+
+
+ODOMETER_SENSORS: tuple[WalkingPadOdometerSensorEntityDescription, ...] = (
+    WalkingPadOdometerSensorEntityDescription(
+        device_class=SensorDeviceClass.DISTANCE,
+        icon="mdi:counter",
+        key="walkingpad_lifetime_distance",
+        name=None,
+        native_unit_of_measurement=UnitOfLength.KILOMETERS,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        suggested_display_precision=2,
+        translation_key="walkingpad_lifetime_distance",
+        value_fn=lambda totals: totals.distance / 1000,
+    ),
+    WalkingPadOdometerSensorEntityDescription(
+        icon="mdi:counter",
+        key="walkingpad_lifetime_steps",
+        name=None,
+        native_unit_of_measurement="steps",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        suggested_display_precision=0,
+        translation_key="walkingpad_lifetime_steps",
+        value_fn=lambda totals: totals.steps,
+    ),
+    WalkingPadOdometerSensorEntityDescription(
+        device_class=SensorDeviceClass.DURATION,
+        icon="mdi:counter",
+        key="walkingpad_lifetime_duration",
+        name=None,
+        native_unit_of_measurement=UnitOfTime.HOURS,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        suggested_display_precision=1,
+        translation_key="walkingpad_lifetime_duration",
+        value_fn=lambda totals: round(totals.running_time / 3600, 4),
+    ),
+)
+
+
+DIAGNOSTIC_SENSORS: tuple[WalkingPadDiagnosticSensorEntityDescription, ...] = (
+    WalkingPadDiagnosticSensorEntityDescription(
+        device_class=SensorDeviceClass.ENUM,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        icon="mdi:bluetooth-connect",
+        key="walkingpad_connection_state",
+        name=None,
+        options=[e.name.lower() for e in WalkingPadConnectionStatus],
+        translation_key="walkingpad_connection_state",
+        value_fn=lambda device: device.connection_status.name.lower(),
+    ),
+    WalkingPadDiagnosticSensorEntityDescription(
+        device_class=SensorDeviceClass.TIMESTAMP,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        icon="mdi:bluetooth-connect",
+        key="walkingpad_connected_since",
+        name=None,
+        translation_key="walkingpad_connected_since",
+        value_fn=lambda device: device.connected_since,
+    ),
+    *(
+        _latency_sensor(command)
+        for command in (
+            "connect",
+            "ask_stats",
+            "start_belt",
+            "stop_belt",
+            "change_speed",
+            "switch_mode",
+        )
+    ),
+    WalkingPadDiagnosticSensorEntityDescription(
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        icon="mdi:bluetooth-connect",
+        key="walkingpad_reconnects",
+        name=None,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        translation_key="walkingpad_reconnects",
+        value_fn=lambda device: device.reconnects,
+        attributes_fn=lambda device: {
+            "connection_failures": device.connection_failures,
+        },
+    ),
+    WalkingPadDiagnosticSensorEntityDescription(
+        device_class=SensorDeviceClass.DURATION,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        icon="mdi:timer-sand",
+        key="walkingpad_notification_interval",
+        name=None,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        translation_key="walkingpad_notification_interval",
+        update_interval=METRICS_UPDATE_INTERVAL,
+        value_fn=lambda device: device.metrics.notification_intervals.percentiles_ms()[
+            "p50"
+        ],
+        attributes_fn=lambda device: (
+            device.metrics.notification_intervals.percentiles_ms()
+        ),
     ),
 )
 
@@ -124,8 +355,35 @@ async def async_setup_entry(
     entry_data: WalkingPadIntegrationData = hass.data[DOMAIN][entry.entry_id]
     coordinator = entry_data["coordinator"]
 
+    descriptions = SENSORS
+    if entry_data["statistics_importer"] is not None:
+        # The totals are imported to the long-term statistics, their sensors
+        # only record the totals of each session.
+        descriptions = tuple(
+            replace(
+                description,
+                state_class=None,
+                status_fields=description.status_fields | {"belt_state"},
+                session_totals=True,
+            )
+            if description.state_class == SensorStateClass.TOTAL_INCREASING
+            else description
+            for description in SENSORS
+        )
+    async_add_entities(
+        WalkingPadSensor(coordinator, description) for description in descriptions
+    )
     async_add_entities(
-        WalkingPadSensor(coordinator, description) for description in SENSORS
+        WalkingPadDerivedSensor(coordinator, description)
+        for description in DERIVED_SENSORS
+    )
+    async_add_entities(
+        WalkingPadOdometerSensor(coordinator, entry_data["odometer"], description)
+        for description in ODOMETER_SENSORS
+    )
+    async_add_entities(
+        WalkingPadDiagnosticSensor(coordinator, description)
+        for description in DIAGNOSTIC_SENSORS
     )
 
 
@@ -145,19 +403,199 @@ class WalkingPadSensor(
         entity_description: WalkingPadSensorEntityDescription,
     ) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, entity_description.status_fields)
+
+        self.entity_description = entity_description
+        self._attr_unique_id = (
+            f"{coordinator.walkingpad_device.mac}-{self.entity_description.key}"
+        )
+        self._written_state: tuple[bool, StateType] | None = None
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when the rounded value or the availability changed."""
+        if self.entity_description.session_totals and (
+            self.coordinator.status.belt_state in (BeltState.ACTIVE, BeltState.STARTING)
+        ):
+            return
+        state = (self.available, self.native_value)
+        if state == self._written_state:
+            return
+        self._written_state = state
+        super()._handle_coordinator_update()
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the state of the sensor."""
+        return self.entity_description.value_fn(self.coordinator.status)
+
+    @property
+    def available(self) -> bool:
+        """Return if entity is available."""
+        return self.coordinator.available
+
+
+class WalkingPadDerivedSensor(
+    CoordinatorEntity[WalkingPadCoordinator],
+    SensorEntity,
+):
+    """Represent a metric derived from the WalkingPad statuses."""
+
+    entity_description: WalkingPadDerivedSensorEntityDescription
+
+    _attr_has_entity_name = True
+
+    def __init__(
+        self,
+        coordinator: WalkingPadCoordinator,
+        entity_description: WalkingPadDerivedSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, DERIVED_STATUS_FIELDS)
+
+        self.entity_description = entity_description
+        self._attr_unique_id = (
+            f"{coordinator.walkingpad_device.mac}-{self.entity_description.key}"
+        )
+        self._written_state: tuple[bool, StateType] | None = None
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when the rounded value or the availability changed."""
+        state = (self.available, self.native_value)
+        if state == self._written_state:
+            return
+        self._written_state = state
+        super()._handle_coordinator_update()
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the state of the sensor."""
+        return self.entity_description.value_fn(
+            self.coordinator.derived_metrics.metrics
+        )
+
+    @property
+    def available(self) -> bool:
+        """Return if entity is available."""
+        return self.coordinator.available
+
+
+class WalkingPadOdometerSensor(
+    CoordinatorEntity[WalkingPadCoordinator],
+    SensorEntity,
+):
+    """Represent a lifetime total of the WalkingPad."""
+
+    entity_description: WalkingPadOdometerSensorEntityDescription
+
+    _attr_has_entity_name = True
+
+    def __init__(
+        self,
+        coordinator: WalkingPadCoordinator,
+        odometer: WalkingPadOdometer,
+        entity_description: WalkingPadOdometerSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        # The totals are updated by the odometer, after the status.
+        super().__init__(coordinator, frozenset())
 
+        self.odometer = odometer
         self.entity_description = entity_description
         self._attr_unique_id = (
             f"{coordinator.walkingpad_device.mac}-{self.entity_description.key}"
         )
+        self._written_state: StateType = None
+
+    async def async_added_to_hass(self) -> None:
+        """Listen for changes of the totals."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.odometer.async_add_listener(self._handle_coordinator_update)
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when the rounded value changed."""
+        state = self.native_value
+        if state == self._written_state:
+            return
+        self._written_state = state
+        super()._handle_coordinator_update()
 
     @property
     def native_value(self) -> StateType:
         """Return the state of the sensor."""
-        return self.entity_description.value_fn(self.coordinator.data)
+        return self.entity_description.value_fn(self.odometer.totals)
+
+    @property
+    def available(self) -> bool:
+        """Return if entity is available."""
+        # The totals are stored, they are known while the WalkingPad is away.
+        return True
+
+
+class WalkingPadDiagnosticSensor(
+    CoordinatorEntity[WalkingPadCoordinator],
+    SensorEntity,
+):
+    """Represent a sensor about the WalkingPad connection."""
+
+    entity_description: WalkingPadDiagnosticSensorEntityDescription
+
+    _attr_has_entity_name = True
+
+    def __init__(
+        self,
+        coordinator: WalkingPadCoordinator,
+        entity_description: WalkingPadDiagnosticSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, entity_description.status_fields)
+
+        self.entity_description = entity_description
+        self._attr_unique_id = (
+            f"{coordinator.walkingpad_device.mac}-{self.entity_description.key}"
+        )
+        self._written_state: tuple | None = None
+
+    async def async_added_to_hass(self) -> None:
+        """Update the sensor at the interval of its description."""
+        await super().async_added_to_hass()
+        if (update_interval := self.entity_description.update_interval) is not None:
+            self.async_on_remove(
+                async_track_time_interval(
+                    self.hass, self._async_update_interval, update_interval
+                )
+            )
+
+    @callback
+    def _async_update_interval(self, _: datetime) -> None:
+        self._handle_coordinator_update()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when the value or the attributes changed."""
+        state = (self.native_value, self.extra_state_attributes)
+        if state == self._written_state:
+            return
+        self._written_state = state
+        super()._handle_coordinator_update()
+
+    @property
+    def native_value(self) -> StateType | datetime:
+        """Return the state of the sensor."""
+        return self.entity_description.value_fn(self.coordinator.walkingpad_device)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the details of the metrics."""
+        if self.entity_description.attributes_fn is None:
+            return None
+        return self.entity_description.attributes_fn(self.coordinator.walkingpad_device)
 
     @property
     def available(self) -> bool:
         """Return if entity is available."""
-        return self.coordinator.connected
+        return True
@@ -0,0 +1,75 @@
+"""Status frame sequencing for the WalkingPad."""
+
+from __future__ import annotations
+
+import logging
+from enum import Enum, unique
+
+from .const import WalkingPadStatus
+
+_LOGGER = logging.getLogger(__name__)
+
+# A frame older than the last one by more than this is not a late frame: the
+# clock used to timestamp the frames has been reset.
+CLOCK_RESET_THRESHOLD_SECONDS = 10
+
+
+@unique
+class FrameVerdict(Enum):
+    """An enumeration of the outcomes of the sequencing of a frame."""
+
+    ACCEPTED = 0
+    DUPLICATE = 1
+    OUT_OF_ORDER = 2
+
+
+class WalkingPadStatusSequencer:
+    """Sort out the status frames worth propagating.
+
+    A frame is a duplicate when all its fields but the timestamp are the same as
+    the last accepted frame, and out of order when its timestamp is older than
+    the last frame.
+    """
+
+    def __init__(self) -> None:
+        """Create a status sequencer."""
+        self._last_fingerprint: tuple | None = None
+        self._last_timestamp: float | None = None
+        self._new_sequence = False
+        self.accepted_frames = 0
+        self.duplicate_frames = 0
+        self.out_of_order_frames = 0
+        self.clock_resets = 0
+
+    def reset(self) -> None:
+        """Start a new sequence, the next frame is accepted whatever its timestamp.
+
+        Called when the link is established again, the frames of a new connection
+        may be timestamped by a clock that has been reset.
+        """
+        self._new_sequence = True
+
+    def check(self, status: WalkingPadStatus) -> FrameVerdict:
+        """Return the verdict for a new frame, and record it unless out of order."""
+        timestamp = status.status_timestamp
+        last_timestamp = self._last_timestamp
+        if last_timestamp is not None and timestamp <= last_timestamp:
+            if (
+                not self._new_sequence
+                and last_timestamp - timestamp <= CLOCK_RESET_THRESHOLD_SECONDS
+            ):
+                self.out_of_order_frames += 1
+                return FrameVerdict.OUT_OF_ORDER
+            _LOGGER.debug("WalkingPad status clock reset detected")
+            self.clock_resets += 1
+        self._last_timestamp = timestamp
+        self._new_sequence = False
+
+        # All the fields but the timestamp, the last one.
+        fingerprint = status[:-1]
+        if fingerprint == self._last_fingerprint:
+            self.duplicate_frames += 1
+            return FrameVerdict.DUPLICATE
+        self._last_fingerprint = fingerprint
+        self.accepted_frames += 1
+        return FrameVerdict.ACCEPTED
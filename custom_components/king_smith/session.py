@@ -0,0 +1,341 @@
+"""Recording of the walking sessions in an append-only file."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import mmap
+import struct
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import NamedTuple
+
+from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import BeltState, WalkingPadStatus
+from .coordinator import WalkingPadCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+SESSION_FILE_MAGIC = b"KSWPSES1"
+SESSION_FILE_SUFFIX = ".kssess"
+
+# Session start as a unix timestamp, seconds since the session start, speed in
+# tenths of km/h, session distance in meters, session steps and running time in
+# seconds.
+SESSION_RECORD = struct.Struct("<IfHIII")
+
+# The samples are appended to the file in batches, at least this often.
+SESSION_FLUSH_INTERVAL = timedelta(seconds=30)
+# Size of the batch that triggers a flush without waiting for the interval.
+SESSION_FLUSH_SAMPLES = 120
+
+# The status fields sampled during a session.
+SESSION_STATUS_FIELDS = frozenset(
+    {
+        "belt_state",
+        "speed",
+        "session_distance",
+        "session_steps",
+        "session_running_time",
+    }
+)
+
+_MOVING_BELT_STATES = (BeltState.ACTIVE, BeltState.STARTING)
+
+
+class SessionSample(NamedTuple):
+    """A status sample of a walking session."""
+
+    session: int
+    time: float
+    speed: float
+    distance: int
+    steps: int
+    running_time: int
+
+
+class SessionSummary(NamedTuple):
+    """The totals of a walking session."""
+
+    start: int
+    duration: float
+    samples: int
+    distance: int
+    steps: int
+    running_time: int
+    max_speed: float
+
+
+def _sample(record: tuple[int, float, int, int, int, int]) -> SessionSample:
+    session, offset, speed, distance, steps, running_time = record
+    return SessionSample(session, offset, speed / 10, distance, steps, running_time)
+
+
+class _SessionIds:
+    """The session of each record, read from the mapping on access for bisect."""
+
+    __slots__ = ("_mapping", "_size")
+
+    def __init__(self, mapping: mmap.mmap, size: int) -> None:
+        self._mapping = mapping
+        self._size = size
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index: int) -> int:
+        offset = len(SESSION_FILE_MAGIC) + index * SESSION_RECORD.size
+        return int.from_bytes(self._mapping[offset : offset + 4], "little")
+
+
+class WalkingPadSessionFile:
+    """A session file, memory mapped for reading.
+
+    The records are ordered by session, the sessions are found by binary search:
+    only the pages holding the requested records are read from the disk.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """Map a session file, raise ValueError if it is not a session file."""
+        self._mapping: mmap.mmap | None = None
+        with path.open("rb") as file:
+            size = file.seek(0, 2)
+            if size:
+                self._mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mapping is not None and (
+            self._mapping[: len(SESSION_FILE_MAGIC)] != SESSION_FILE_MAGIC
+        ):
+            self.close()
+            raise ValueError(f"{path} is not a WalkingPad session file")
+        # A record interrupted by a crash is ignored.
+        records = (size - len(SESSION_FILE_MAGIC)) // SESSION_RECORD.size if size else 0
+        self._sessions = _SessionIds(self._mapping, records) if records else []
+
+    def __enter__(self) -> WalkingPadSessionFile:
+        """Return the mapped file."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Unmap the file."""
+        self.close()
+
+    def close(self) -> None:
+        """Unmap the file."""
+        if self._mapping is not None:
+            self._mapping.close()
+            self._mapping = None
+
+    def __len__(self) -> int:
+        """Return the number of samples in the file."""
+        return len(self._sessions)
+
+    def _read(self, start: int, stop: int) -> list[SessionSample]:
+        assert self._mapping is not None
+        offset = len(SESSION_FILE_MAGIC)
+        return [
+            _sample(record)
+            for record in SESSION_RECORD.iter_unpack(
+                self._mapping[
+                    offset + start * SESSION_RECORD.size : offset
+                    + stop * SESSION_RECORD.size
+                ]
+            )
+        ]
+
+    def last_session(self) -> int:
+        """Return the last session of the file, 0 if there is none."""
+        return self._sessions[len(self._sessions) - 1] if self._sessions else 0
+
+    def samples(self, session: int) -> list[SessionSample]:
+        """Return the samples of a session."""
+        return self._read(
+            bisect_left(self._sessions, session), bisect_right(self._sessions, session)
+        )
+
+    def last_sessions(self, count: int) -> list[SessionSummary]:
+        """Return the summaries of the last sessions, the latest first."""
+        summaries = []
+        stop = len(self._sessions)
+        while stop and len(summaries) < count:
+            start = bisect_left(self._sessions, self._sessions[stop - 1], 0, stop)
+            samples = self._read(start, stop)
+            first, last = samples[0], samples[-1]
+            summaries.append(
+                SessionSummary(
+                    first.session,
+                    last.time,
+                    len(samples),
+                    last.distance - first.distance,
+                    last.steps - first.steps,
+                    last.running_time - first.running_time,
+                    max(sample.speed for sample in samples),
+                )
+            )
+            stop = start
+        return summaries
+
+
+def read_last_sessions(path: Path, count: int) -> list[SessionSummary]:
+    """Return the summaries of the last sessions of a file, the latest first."""
+    if not path.exists():
+        return []
+    try:
+        with WalkingPadSessionFile(path) as session_file:
+            return session_file.last_sessions(count)
+    except ValueError as err:
+        _LOGGER.warning("Unable to read the WalkingPad sessions: %s", err)
+        return []
+
+
+def read_last_session(path: Path) -> int:
+    """Return the last session of a file, 0 if there is none."""
+    if not path.exists():
+        return 0
+    with WalkingPadSessionFile(path) as session_file:
+        return session_file.last_session()
+
+
+def _append_records(path: Path, records: bytes) -> None:
+    """Append records to a session file, creating it if needed."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("ab") as file:
+        size = file.tell()
+        if not size:
+            file.write(SESSION_FILE_MAGIC)
+        elif (partial := (size - len(SESSION_FILE_MAGIC)) % SESSION_RECORD.size) != 0:
+            # Drop a record interrupted by a crash, to keep the records aligned.
+            file.truncate(size - partial)
+        file.write(records)
+
+
+class WalkingPadSessionRecorder:
+    """Record the status samples of the walking sessions of a WalkingPad.
+
+    A session lasts from the belt start to its stop. The samples are buffered on
+    the event loop and appended to the session file by the executor, in batches.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, coordinator: WalkingPadCoordinator, path: Path
+    ) -> None:
+        """Create a session recorder writing to the given file."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self.path = path
+        self._buffer = bytearray()
+        self._flush_lock = asyncio.Lock()
+        self._last_status: WalkingPadStatus | None = None
+        self._session: int | None = None
+        self._last_session = 0
+        self._session_start = 0.0
+        self._unsubscribers: list[CALLBACK_TYPE] = []
+        self.recorded_sessions = 0
+        self.recorded_samples = 0
+
+    async def async_load(self) -> None:
+        """Read the last recorded session, the next ones are numbered after it.
+
+        The sessions of the file stay ordered when the clock went back or when a
+        session started in the second the last one did before a restart.
+        """
+        try:
+            self._last_session = await self.hass.async_add_executor_job(
+                read_last_session, self.path
+            )
+        except (OSError, ValueError) as err:
+            _LOGGER.warning(
+                "Unable to read the WalkingPad sessions from %s: %s", self.path, err
+            )
+
+    @callback
+    def async_start(self) -> None:
+        """Start recording the sessions."""
+        self._unsubscribers = [
+            self.coordinator.async_add_status_listener(
+                self._async_handle_status, SESSION_STATUS_FIELDS
+            ),
+            async_track_time_interval(
+                self.hass,
+                self._async_flush_interval,
+                SESSION_FLUSH_INTERVAL,
+                name="Flush the WalkingPad session samples",
+                cancel_on_shutdown=True,
+            ),
+            self.hass.bus.async_listen(
+                EVENT_HOMEASSISTANT_FINAL_WRITE, self._async_final_write
+            ),
+        ]
+
+    async def async_stop(self) -> None:
+        """Stop recording and write the buffered samples."""
+        while self._unsubscribers:
+            self._unsubscribers.pop()()
+        await self.async_flush()
+
+    @callback
+    def _async_handle_status(self) -> None:
+        """Sample the status reported by the WalkingPad during a session."""
+        status = self.coordinator.data
+        if status is self._last_status:
+            # Only the expected effect of a command changed.
+            return
+        self._last_status = status
+
+        moving = status.belt_state in _MOVING_BELT_STATES
+        if self._session is None:
+            if not moving:
+                return
+            # Sessions starting within the same second stay distinct.
+            self._session = self._last_session = max(
+                int(time.time()), self._last_session + 1
+            )
+            self._session_start = time.monotonic()
+            self.recorded_sessions += 1
+
+        self._buffer += SESSION_RECORD.pack(
+            self._session,
+            time.monotonic() - self._session_start,
+            round(status.speed * 10),
+            status.session_distance,
+            status.session_steps,
+            status.session_running_time,
+        )
+        self.recorded_samples += 1
+        if not moving:
+            # The last sample of the session.
+            self._session = None
+            self._async_schedule_flush()
+        elif len(self._buffer) >= SESSION_FLUSH_SAMPLES * SESSION_RECORD.size:
+            self._async_schedule_flush()
+
+    @callback
+    def _async_schedule_flush(self) -> None:
+        self.hass.async_create_background_task(
+            self.async_flush(), "Flush the WalkingPad session samples"
+        )
+
+    async def _async_flush_interval(self, _: datetime) -> None:
+        await self.async_flush()
+
+    async def _async_final_write(self, _: Event) -> None:
+        await self.async_flush()
+
+    async def async_flush(self) -> None:
+        """Append the buffered samples to the session file."""
+        async with self._flush_lock:
+            if not self._buffer:
+                return
+            records, self._buffer = bytes(self._buffer), bytearray()
+            try:
+                await self.hass.async_add_executor_job(
+                    _append_records, self.path, records
+                )
+            except OSError as err:
+                _LOGGER.warning(
+                    "Unable to write the WalkingPad sessions to %s: %s", self.path, err
+                )
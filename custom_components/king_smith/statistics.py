@@ -0,0 +1,230 @@
+"""Import of the walked distance, steps and time to the long-term statistics."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Callable
+from datetime import datetime
+from typing import Any, NamedTuple
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    get_last_statistics,
+)
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP, UnitOfLength, UnitOfTime
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_utc_time_change
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, BeltState, WalkingPadStatus
+from .coordinator import WalkingPadCoordinator
+from .counters import session_progress
+
+try:
+    from homeassistant.components.recorder.models import StatisticMeanType
+except ImportError:  # Home Assistant < 2025.4
+    _NO_MEAN: dict[str, Any] = {"has_mean": False}
+else:
+    _NO_MEAN = {"mean_type": StatisticMeanType.NONE}
+
+_LOGGER = logging.getLogger(__name__)
+
+# The status fields the statistics are computed from.
+STATISTICS_STATUS_FIELDS = frozenset(
+    {"belt_state", "session_distance", "session_steps", "session_running_time"}
+)
+
+# The statistics are imported a few seconds after each hour, once it is complete.
+STATISTICS_IMPORT_SECOND = 10
+
+_MOVING_BELT_STATES = (BeltState.ACTIVE, BeltState.STARTING)
+
+
+class ImportedStatistic(NamedTuple):
+    """A statistic summing a session counter of the WalkingPad."""
+
+    key: str
+    unit_of_measurement: str
+    value_fn: Callable[[WalkingPadStatus], float]
+
+
+IMPORTED_STATISTICS: tuple[ImportedStatistic, ...] = (
+    ImportedStatistic(
+        "distance",
+        UnitOfLength.KILOMETERS,
+        lambda status: status.session_distance / 1000,
+    ),
+    ImportedStatistic("steps", "steps", lambda status: status.session_steps),
+    ImportedStatistic(
+        "duration",
+        UnitOfTime.HOURS,
+        lambda status: status.session_running_time / 3600,
+    ),
+)
+
+
+def _hour_start(time: datetime) -> datetime:
+    return time.replace(minute=0, second=0, microsecond=0)
+
+
+class WalkingPadStatisticsImporter:
+    """Sum the walked distance, steps and time per hour, and import the sums.
+
+    The amounts are summed in memory and imported in bulk as external statistics
+    at the end of each hour and of each session: a few rows per hour instead of
+    a state per status update. The hour in progress is imported again until it
+    is complete.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, coordinator: WalkingPadCoordinator, name: str
+    ) -> None:
+        """Create a statistics importer for a WalkingPad."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self._name = name
+        address = coordinator.walkingpad_device.mac.replace(":", "").lower()
+        self.statistic_ids = tuple(
+            f"{DOMAIN}:{address}_{statistic.key}" for statistic in IMPORTED_STATISTICS
+        )
+        # Amounts of each statistic per hour, for the hours not imported yet and
+        # the hour in progress.
+        self._hours: dict[datetime, list[float]] = {}
+        # Sums of each statistic up to the first hour of _hours, None until read
+        # from the database.
+        self._sums: list[float] | None = None
+        self._last_values: tuple[float, ...] | None = None
+        self._last_status: WalkingPadStatus | None = None
+        self._moving = False
+        self._import_lock = asyncio.Lock()
+        self._unsubscribers: list[CALLBACK_TYPE] = []
+        self.imported_rows = 0
+
+    @callback
+    def async_start(self) -> None:
+        """Start summing and importing the statistics."""
+        self._unsubscribers = [
+            self.coordinator.async_add_status_listener(
+                self._async_handle_status, STATISTICS_STATUS_FIELDS
+            ),
+            async_track_utc_time_change(
+                self.hass,
+                self._async_hourly_import,
+                minute=0,
+                second=STATISTICS_IMPORT_SECOND,
+            ),
+            self.hass.bus.async_listen(EVENT_HOMEASSISTANT_STOP, self._async_on_stop),
+        ]
+
+    async def async_stop(self) -> None:
+        """Stop summing and import the pending amounts."""
+        while self._unsubscribers:
+            self._unsubscribers.pop()()
+        await self.async_import()
+
+    @callback
+    def _async_handle_status(self) -> None:
+        """Add the progress reported by the WalkingPad to the current hour."""
+        status = self.coordinator.data
+        if status is self._last_status:
+            # Only the expected effect of a command changed.
+            return
+        self._last_status = status
+        if not status.status_timestamp:
+            # Not reported by the WalkingPad yet.
+            return
+
+        values = tuple(statistic.value_fn(status) for statistic in IMPORTED_STATISTICS)
+        last_values, self._last_values = self._last_values, values
+        if last_values is not None:
+            amounts = self._hours.setdefault(
+                _hour_start(dt_util.utcnow()), [0.0] * len(IMPORTED_STATISTICS)
+            )
+            for index, amount in enumerate(session_progress(values, last_values)):
+                amounts[index] += amount
+
+        was_moving, self._moving = (
+            self._moving,
+            status.belt_state in _MOVING_BELT_STATES,
+        )
+        if was_moving and not self._moving:
+            self.hass.async_create_background_task(
+                self.async_import(), "Import the WalkingPad session statistics"
+            )
+
+    async def _async_hourly_import(self, _: datetime) -> None:
+        await self.async_import()
+
+    async def _async_on_stop(self, _: Event) -> None:
+        await self.async_import()
+
+    async def _async_load_sums(self) -> list[float]:
+        """Read the sums of the last imported hours from the database."""
+        sums = []
+        for index, statistic_id in enumerate(self.statistic_ids):
+            last_statistics = await get_instance(self.hass).async_add_executor_job(
+                get_last_statistics,
+                self.hass,
+                1,
+                statistic_id,
+                False,
+                {"state", "sum"},
+            )
+            if not (rows := last_statistics.get(statistic_id)):
+                sums.append(0.0)
+                continue
+            last_row = rows[0]
+            total = last_row.get("sum") or 0.0
+            start = dt_util.utc_from_timestamp(last_row["start"])
+            if start in self._hours or start == _hour_start(dt_util.utcnow()):
+                # The hour was in progress when it was imported, it is summed
+                # again with the amounts walked since.
+                state = last_row.get("state") or 0.0
+                total -= state
+                self._hours.setdefault(start, [0.0] * len(IMPORTED_STATISTICS))[
+                    index
+                ] += state
+            sums.append(total)
+        return sums
+
+    async def async_import(self) -> None:
+        """Import the amounts of the pending hours and of the hour in progress."""
+        async with self._import_lock:
+            if not self._hours:
+                return
+            if self._sums is None:
+                self._sums = await self._async_load_sums()
+
+            current_hour = _hour_start(dt_util.utcnow())
+            hours = sorted(self._hours)
+            for index, statistic in enumerate(IMPORTED_STATISTICS):
+                total = self._sums[index]
+                rows = []
+                for hour in hours:
+                    amount = self._hours[hour][index]
+                    total += amount
+                    rows.append(StatisticData(start=hour, state=amount, sum=total))
+                async_add_external_statistics(
+                    self.hass,
+                    StatisticMetaData(
+                        **_NO_MEAN,
+                        has_sum=True,
+                        name=f"{self._name} {statistic.key}",
+                        source=DOMAIN,
+                        statistic_id=self.statistic_ids[index],
+                        unit_of_measurement=statistic.unit_of_measurement,
+                    ),
+                    rows,
+                )
+                self.imported_rows += len(rows)
+
+            # The complete hours are final, their amounts join the sums.
+            for hour in hours:
+                if hour < current_hour:
+                    amounts = self._hours.pop(hour)
+                    self._sums = [
+                        total + amount for total, amount in zip(self._sums, amounts)
+                    ]
@@ -1,6 +1,5 @@
 """Walkingpad switch support."""
 
-import asyncio
 from abc import ABC
 from typing import Any
 
@@ -10,9 +9,10 @@ from homeassistant.components.switch import (
     SwitchEntityDescription,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from . import WalkingPadIntegrationData
 from .const import (
@@ -24,8 +24,7 @@ from .const import (
     BeltState,
     WalkingPadMode,
 )
-from .coordinator import STATUS_UPDATE_INTERVAL, WalkingPadCoordinator
-from .utils import TemporaryValue
+from .coordinator import WalkingPadCoordinator
 
 SWITCH_KEY = "walkingpad_belt_switch"
 
@@ -57,13 +56,18 @@ async def async_setup_entry(
         async_add_entities([WalkingPadBeltSwitchAuto(coordinator)])
 
 
-class WalkingPadBeltSwitchBase(SwitchEntity, ABC):
-    """Base class for WalkingPad belt switch entities."""
+class WalkingPadBeltSwitchBase(
+    CoordinatorEntity[WalkingPadCoordinator], SwitchEntity, ABC
+):
+    """Base class for WalkingPad belt switch entities.
+
+    The state is pushed by the coordinator, and only written when the switch
+    turns on or off or its availability changes.
+    """
 
     entity_description: SwitchEntityDescription
-    coordinator: WalkingPadCoordinator
-    _temporary_belt_state: TemporaryValue[BeltState]
-    _temporary_mode: TemporaryValue[WalkingPadMode]
+    # The status fields the state of the switch depends on.
+    status_fields: frozenset[str] = frozenset({"belt_state"})
 
     @staticmethod
     def _create_entity_description(translation_key: str) -> SwitchEntityDescription:
@@ -78,55 +82,36 @@ class WalkingPadBeltSwitchBase(SwitchEntity, ABC):
 
     def __init__(self, coordinator: WalkingPadCoordinator):
         """Initialize the belt switch."""
-        self._temporary_belt_state = TemporaryValue[BeltState]()
-        self._temporary_mode = TemporaryValue[WalkingPadMode]()
-        self.coordinator = coordinator
+        super().__init__(coordinator, self.status_fields)
         self.entity_description = self._create_entity_description(
             "walkingpad_belt_switch"
         )
         self._attr_unique_id = (
             f"{coordinator.walkingpad_device.mac}-{self.entity_description.key}"
         )
-        super().__init__()
+        self._written_state: tuple[bool, bool] | None = None
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when the switch or its availability changed."""
+        state = (self.available, self.is_on)
+        if state == self._written_state:
+            return
+        self._written_state = state
+        super()._handle_coordinator_update()
+
+    @property
+    def available(self) -> bool:
+        """Return if entity is available."""
+        return self.coordinator.available
 
     @property
     def is_on(self) -> bool:
         """Return true if switch is on."""
-        current_timestamp = self.coordinator.data.get("status_timestamp", 0)
-        current_belt_state = self.coordinator.data.get("belt_state")
-
-        # Check expiration for temporary belt state with special condition
-        # Don't reset if belt is starting (to keep temporary state during startup)
-        if (
-            self._temporary_belt_state.has_value
-            and current_belt_state != BeltState.STARTING
-            and current_timestamp > self._temporary_belt_state.expiration_timestamp
-        ):
-            self._temporary_belt_state.reset()
-
-        # Use temporary value if available (without auto-expiration check),
-        # otherwise use current state
-        belt_state = self._temporary_belt_state.peek(
-            current_belt_state or BeltState.STOPPED
-        )
-
-        return belt_state in [BeltState.ACTIVE, BeltState.STARTING]
-
-    def set_temporary_belt_state(self, belt_state: BeltState) -> None:
-        """Set a temporary belt state."""
-        expiration_timestamp = (
-            self.coordinator.data.get("status_timestamp", 0)
-            + STATUS_UPDATE_INTERVAL.total_seconds()
-        )
-        self._temporary_belt_state.set(belt_state, expiration_timestamp)
-
-    def set_temporary_mode(self, mode: WalkingPadMode) -> None:
-        """Set a temporary mode."""
-        expiration_timestamp = (
-            self.coordinator.data.get("status_timestamp", 0)
-            + STATUS_UPDATE_INTERVAL.total_seconds()
-        )
-        self._temporary_mode.set(mode, expiration_timestamp)
+        return self.coordinator.status.belt_state in [
+            BeltState.ACTIVE,
+            BeltState.STARTING,
+        ]
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn the switch on."""
@@ -146,26 +131,43 @@ class WalkingPadBeltSwitchManual(WalkingPadBeltSwitchBase):
         self.entity_description = self._create_entity_description(
             "walkingpad_belt_switch_manual"
         )
+        # Identifies the latest turn on or off request.
+        self._belt_request = object()
+
+    async def _start_belt(self, request: object) -> bool:
+        """Switch to manual mode if needed, then start the belt."""
+        walkingpad_device = self.coordinator.walkingpad_device
+        if self.coordinator.data.mode != WalkingPadMode.MANUAL:
+            # Returns once the WalkingPad has switched to manual mode.
+            await walkingpad_device.switch_mode(WalkingPadMode.MANUAL)
+            if request is not self._belt_request:
+                # Turned off while switching the mode.
+                return False
+        return await walkingpad_device.start_belt()
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn the switch on."""
-        current_mode = self.coordinator.data.get("mode")
-        if current_mode != WalkingPadMode.MANUAL:
-            await self.coordinator.walkingpad_device.switch_mode(WalkingPadMode.MANUAL)
-            await asyncio.sleep(1.5)
-        self.set_temporary_mode(WalkingPadMode.MANUAL)
-        self.set_temporary_belt_state(BeltState.STARTING)
-        await self.coordinator.walkingpad_device.start_belt()
+        self._belt_request = request = object()
+        await self.coordinator.async_run_command(
+            self._start_belt(request),
+            mode=WalkingPadMode.MANUAL,
+            belt_state=BeltState.STARTING,
+        )
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the switch off."""
-        self.set_temporary_belt_state(BeltState.STOPPED)
-        await self.coordinator.walkingpad_device.stop_belt()
+        self._belt_request = object()
+        await self.coordinator.async_run_command(
+            self.coordinator.walkingpad_device.stop_belt(),
+            belt_state=BeltState.STOPPED,
+        )
 
 
 class WalkingPadBeltSwitchAuto(WalkingPadBeltSwitchBase):
     """Represent the WalkingPad belt switch in auto mode."""
 
+    status_fields = frozenset({"belt_state", "mode"})
+
     def __init__(self, coordinator: WalkingPadCoordinator):
         """Initialize the belt switch."""
         super().__init__(coordinator)
@@ -176,30 +178,23 @@ class WalkingPadBeltSwitchAuto(WalkingPadBeltSwitchBase):
     @property
     def is_on(self) -> bool:
         """Return true if switch is on."""
-        current_timestamp = self.coordinator.data.get("status_timestamp", 0)
-        current_mode = self.coordinator.data.get("mode")
-        current_belt_state = self.coordinator.data.get("belt_state")
-
-        mode = self._temporary_mode.get(
-            current_timestamp, current_mode or WalkingPadMode.MANUAL
-        )
-        belt_state = self._temporary_belt_state.get(
-            current_timestamp, current_belt_state or BeltState.STOPPED
-        )
-
+        mode = self.coordinator.status.mode
         if mode == WalkingPadMode.AUTO:
             return True
         if mode == WalkingPadMode.STANDBY:
             return False
-        return belt_state in [BeltState.ACTIVE, BeltState.STARTING]
+        return super().is_on
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn the switch on."""
-        self.set_temporary_mode(WalkingPadMode.AUTO)
-        await self.coordinator.walkingpad_device.switch_mode(WalkingPadMode.AUTO)
+        await self.coordinator.async_run_command(
+            self.coordinator.walkingpad_device.switch_mode(WalkingPadMode.AUTO),
+            mode=WalkingPadMode.AUTO,
+        )
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the switch off."""
-        self.set_temporary_mode(WalkingPadMode.STANDBY)
-        self.set_temporary_belt_state(BeltState.STOPPED)
-        await self.coordinator.walkingpad_device.switch_mode(WalkingPadMode.STANDBY)
+        await self.coordinator.async_run_command(
+            self.coordinator.walkingpad_device.switch_mode(WalkingPadMode.STANDBY),
+            mode=WalkingPadMode.STANDBY,
+        )
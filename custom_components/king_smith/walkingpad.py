@@ -2,74 +2,242 @@
 
 import asyncio
 import logging
-from enum import Enum, unique
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+from enum import Enum
+from functools import partial
+from typing import Any, TypeVar
 
 from bleak import BleakError
 from bleak.backends.device import BLEDevice
 from ph4_walkingpad.pad import Controller, WalkingPadCurStatus
 
+from .capture import WalkingPadCapture
+from .connection import WalkingPadConnectionManager, WalkingPadConnectionStatus
 from .const import BeltState, WalkingPadMode, WalkingPadStatus
+from .controller import WalkingPadController
+from .history import WalkingPadHistory
+from .metrics import WalkingPadMetrics
+from .scheduler import (
+    DEFAULT_COMMAND_SPACING_SECONDS,
+    CommandPriority,
+    WalkingPadCommandScheduler,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+_EnumT = TypeVar("_EnumT", bound=Enum)
 
-@unique
-class WalkingPadConnectionStatus(Enum):
-    """An enumeration of the possible connection states."""
+# Maximum time to wait for the WalkingPad to report the effect of a command.
+COMMAND_ACK_TIMEOUT_SECONDS = 5
 
-    NOT_CONNECTED = 0
-    CONNECTING = 1
-    CONNECTED = 2
+# The waits for acknowledgement ended by a new command of each group: the effect
+# of the previous commands will not be reported anymore.
+_SUPERSEDED_ACKNOWLEDGEMENTS: dict[str, tuple[str, ...]] = {
+    "belt": ("belt", "speed"),
+    "speed": ("speed",),
+}
+
+# Builds the controller from the device name, a callback returning the bluetooth
+# device to connect to, and a callback to call when the link is lost.
+ControllerFactory = Callable[
+    [str, Callable[[], BLEDevice], Callable[[], None]], Controller
+]
+
+
+def _lookup_table(enum: type[_EnumT], unknown: _EnumT) -> tuple[_EnumT, ...]:
+    """Map each byte value to its enum member, or to unknown."""
+    members = {member.value: member for member in enum}
+    return tuple(members.get(value, unknown) for value in range(256))
+
+
+# Status fields are single bytes, they are decoded through precomputed tables
+# indexed by the raw value.
+_BELT_STATES = _lookup_table(BeltState, BeltState.UNKNOWN)
+_MODES = _lookup_table(WalkingPadMode, WalkingPadMode.UNKNOWN)
+# The speed is reported in tenths of km/h.
+_SPEEDS: tuple[float, ...] = tuple(value / 10 for value in range(256))
 
 
 class WalkingPad:
     """The WalkingPad device."""
 
-    def __init__(self, name: str, ble_device: BLEDevice) -> None:
-        """Create a WalkingPad object."""
+    def __init__(
+        self,
+        name: str,
+        ble_device: BLEDevice,
+        command_spacing: float = DEFAULT_COMMAND_SPACING_SECONDS,
+        controller_factory: ControllerFactory = WalkingPadController,
+    ) -> None:
+        """Create a WalkingPad object.
+
+        The controller factory allows to drive an emulated device instead of a
+        bluetooth one.
+        """
 
         self._name = name
         self._ble_device = ble_device
-        self._controller = Controller()
+        self._controller = controller_factory(
+            name, lambda: self._ble_device, self._on_disconnected
+        )
         self._controller.log_messages_info = False
+        # The spacing between commands is enforced by the scheduler.
+        self._controller.minimal_cmd_space = 0
+        self._scheduler = WalkingPadCommandScheduler(command_spacing)
+        self.metrics = WalkingPadMetrics()
+        self.history = WalkingPadHistory()
         self._callbacks = []
-        self._connection_status = WalkingPadConnectionStatus.NOT_CONNECTED
+        self._acknowledgements: list[
+            tuple[Callable[[WalkingPadStatus], bool], asyncio.Future, str | None]
+        ] = []
+        self._connection = WalkingPadConnectionManager(
+            self._connect, self._disconnect, self.update_state
+        )
+        self._connection.register_status_callback(self.history.record_connection)
         self._register_controller_callbacks()
 
     def _register_controller_callbacks(self):
         self._controller.handler_cur_status = self._on_status_update
 
-    def _begin_cmd(self) -> asyncio.Lock:
-        return asyncio.Lock()
+    async def _run_command(
+        self, name: str, command: Callable[[], Awaitable[Any]]
+    ) -> bool:
+        """Send a command to the controller.
 
-    async def _end_cmd(self):
-        await asyncio.sleep(0.75)
+        Must only be called from the command scheduler.
+        Return true if the command has been sent.
+        """
+        if not self.connected:
+            return False
+        start = time.monotonic()
+        sent = False
+        try:
+            await command()
+            sent = True
+        except BleakError as err:
+            _LOGGER.warning("Bluetooth error : %s", err)
+            self._connection.notify_connection_lost()
+            return False
+        finally:
+            self._record_command(name, start, sent)
+        self._connection.notify_activity()
+        return True
+
+    async def _send_command(
+        self,
+        priority: CommandPriority,
+        name: str,
+        command: Callable[[], Awaitable[Any]],
+        coalesce_key: str | None = None,
+        supersedes: str | None = None,
+    ) -> bool:
+        """Wait for the link to be up and send a command through the scheduler."""
+        if not await self._connection.wait_connected():
+            _LOGGER.warning("Unable to send %s, WalkingPad is not connected", name)
+            return False
+        sent = await self._scheduler.submit(
+            priority,
+            name,
+            partial(self._run_command, name, command),
+            coalesce_key,
+            supersedes,
+        )
+        return bool(sent)
+
+    async def _wait_for_status(
+        self,
+        predicate: Callable[[WalkingPadStatus], bool],
+        group: str | None = None,
+        timeout: float = COMMAND_ACK_TIMEOUT_SECONDS,
+    ) -> bool:
+        """Wait until the WalkingPad reports a status matching the predicate.
+
+        The status is requested regularly while waiting.
+        Return false if no matching status has been received before the timeout,
+        or if a newer command superseded the wait.
+        """
+        if group is not None:
+            superseded_groups = _SUPERSEDED_ACKNOWLEDGEMENTS[group]
+            for _, future, waiting_group in self._acknowledgements:
+                if waiting_group in superseded_groups and not future.done():
+                    future.set_result(None)
+        acknowledgement = (
+            predicate,
+            asyncio.get_running_loop().create_future(),
+            group,
+        )
+        self._acknowledgements.append(acknowledgement)
+        try:
+            async with asyncio.timeout(timeout):
+                while not acknowledgement[1].done():
+                    await self.update_state()
+                    await asyncio.wait(
+                        (acknowledgement[1],), timeout=self._scheduler.command_spacing
+                    )
+        except TimeoutError:
+            _LOGGER.debug("WalkingPad did not acknowledge the command in time")
+            return False
+        finally:
+            self._acknowledgements.remove(acknowledgement)
+        return acknowledgement[1].result() is not None
+
+    def _record_command(self, name: str, start: float, success: bool) -> None:
+        """Record a command started at the given monotonic time."""
+        duration = time.monotonic() - start
+        self.metrics.record_command(name, duration, success)
+        self.history.record_command(name, time.time() - duration, duration, success)
+
+    def _on_disconnected(self) -> None:
+        self._connection.notify_connection_lost()
 
     def _on_status_update(self, sender, data: WalkingPadCurStatus) -> None:
         """Update current state."""
+        self.metrics.record_notification(time.monotonic())
+
+        status = WalkingPadStatus(
+            _BELT_STATES[data.belt_state & 0xFF],
+            _SPEEDS[data.speed & 0xFF],
+            _MODES[data.manual_mode & 0xFF],
+            data.time,
+            data.dist * 10,
+            data.steps,
+            data.rtime,
+        )
+        self.history.record_frame(status)
 
-        status: WalkingPadStatus = {
-            "belt_state": (
-                BeltState(data.belt_state)
-                if data.belt_state in iter(BeltState)
-                else BeltState.UNKNOWN
-            ),
-            "speed": data.speed / 10,
-            "mode": WalkingPadMode(data.manual_mode),
-            "session_distance": data.dist * 10,
-            "session_running_time": data.time,
-            "session_steps": data.steps,
-            "status_timestamp": data.rtime,
-        }
-
-        if len(self._callbacks) > 0:
-            for callback in self._callbacks:
-                callback(status)
+        for predicate, future, _ in self._acknowledgements:
+            if not future.done() and predicate(status):
+                future.set_result(status)
+
+        for callback in self._callbacks:
+            callback(status)
+
+    def start_capture(self) -> WalkingPadCapture:
+        """Start recording the frames exchanged with the WalkingPad."""
+        self._controller.capture = WalkingPadCapture()
+        return self._controller.capture
+
+    def stop_capture(self) -> WalkingPadCapture | None:
+        """Stop recording the frames and return the capture, if any."""
+        capture, self._controller.capture = self._controller.capture, None
+        return capture
 
     def register_status_callback(self, callback) -> None:
         """Register a status callback."""
         self._callbacks.append(callback)
 
+    def register_connection_callback(
+        self, callback: Callable[[WalkingPadConnectionStatus], None]
+    ) -> None:
+        """Register a callback called on each connection status change."""
+        self._connection.register_status_callback(callback)
+
+    @property
+    def controller(self) -> Controller:
+        """The controller of the device, the hot paths are wrapped while profiling."""
+        return self._controller
+
     @property
     def mac(self):
         """Mac address."""
@@ -83,114 +251,153 @@ class WalkingPad:
     @property
     def connection_status(self) -> WalkingPadConnectionStatus:
         """Connection status."""
-        return self._connection_status
+        return self._connection.status
 
     @property
     def connected(self) -> bool:
         """Boolean property to check if the device is connected."""
-        return self._connection_status == WalkingPadConnectionStatus.CONNECTED
+        return self._connection.connected
+
+    @property
+    def connected_since(self) -> datetime | None:
+        """Time at which the current connection has been established."""
+        return self._connection.connected_since
+
+    @property
+    def reconnects(self) -> int:
+        """Number of connections established after the first one."""
+        return self._connection.reconnects
+
+    @property
+    def connection_failures(self) -> int:
+        """Number of failed connection attempts."""
+        return self._connection.connection_failures
+
+    @property
+    def busy(self) -> bool:
+        """Return true if a command is holding or waiting for the link."""
+        return self._scheduler.busy
+
+    @property
+    def coalesced_commands(self) -> int:
+        """Number of commands dropped because a newer one superseded them."""
+        return self._scheduler.coalesced_commands
+
+    async def _connect(self) -> None:
+        start = time.monotonic()
+        connected = False
+        try:
+            await self._controller.run(self._ble_device)
+            connected = True
+        finally:
+            self.metrics.record_command("connect", time.monotonic() - start, connected)
+        self.metrics.reset_notification_interval()
+
+    async def _disconnect(self) -> None:
+        await self._scheduler.submit(
+            CommandPriority.STOP, "disconnect", self._controller.disconnect
+        )
+
+    def set_ble_device(self, ble_device: BLEDevice) -> None:
+        """Set the device to use for the next connections."""
+        self._ble_device = ble_device
+
+    def notify_presence(self) -> None:
+        """Record that the device has been seen advertising."""
+        self._connection.notify_presence()
 
     async def connect(self) -> None:
-        """Connect the device."""
-        lock = self._begin_cmd()
-        if self._connection_status == WalkingPadConnectionStatus.CONNECTING:
-            _LOGGER.info("Already connecting to WalkingPad")
-            return
-        _LOGGER.info("Connecting to WalkingPad")
-        async with lock:
-            self._connection_status = WalkingPadConnectionStatus.CONNECTING
-            try:
-                await self._controller.run(self._ble_device)
-                self._connection_status = WalkingPadConnectionStatus.CONNECTED
-            except (BleakError, TimeoutError) as err:
-                _LOGGER.warning("Unable to connect to WalkingPad : %s", err)
-                self._connection_status = WalkingPadConnectionStatus.NOT_CONNECTED
-            except Exception:  # pylint: disable=broad-except
-                _LOGGER.warning("Unable to connect to WalkingPad")
-                self._connection_status = WalkingPadConnectionStatus.NOT_CONNECTED
-            await self._end_cmd()
+        """Connect the device and keep the link up until disconnect is called."""
+        self._connection.start()
+        await self._connection.wait_connected()
 
     async def disconnect(self) -> None:
         """Disconnect the device."""
-        if self._connection_status == WalkingPadConnectionStatus.NOT_CONNECTED:
-            return
-        lock = self._begin_cmd()
-        async with lock:
-            try:
-                await self._controller.disconnect()
-            finally:
-                self._connection_status = WalkingPadConnectionStatus.NOT_CONNECTED
-            await self._end_cmd()
+        await self._connection.stop()
+
+    async def suspend(self) -> None:
+        """Disconnect the device until a command is sent or it advertises again."""
+        await self._connection.suspend()
+
+    def shutdown(self) -> None:
+        """Stop the connection and drop the pending commands."""
+        self._connection.shutdown()
+        self._scheduler.shutdown()
 
     async def update_state(self) -> None:
         """Update device state."""
-        # Grab the lock so we don't run while another command is running
-        if self._connection_status == WalkingPadConnectionStatus.NOT_CONNECTED:
-            await self.connect()
-        lock = self._begin_cmd()
-        async with lock:
-            if not self.connected:
-                return
-            try:
-                await self._controller.ask_stats()
-                # Skip callback so we don't reset debouncer
-            except BleakError as err:
-                _LOGGER.warning("Bluetooth error : %s", err)
-                self._connection_status = WalkingPadConnectionStatus.NOT_CONNECTED
-
-    async def start_belt(self) -> None:
-        """Start the belt."""
-        if self._connection_status == WalkingPadConnectionStatus.NOT_CONNECTED:
-            await self.connect()
-        lock = self._begin_cmd()
-        async with lock:
-            if not self.connected:
-                return
-            try:
-                await self._controller.start_belt()
-            except BleakError as err:
-                _LOGGER.warning("Bluetooth error : %s", err)
-                self._connection_status = WalkingPadConnectionStatus.NOT_CONNECTED
-
-    async def stop_belt(self) -> None:
-        """Start the belt."""
-        if self._connection_status == WalkingPadConnectionStatus.NOT_CONNECTED:
-            await self.connect()
-        lock = self._begin_cmd()
-        async with lock:
-            if not self.connected:
-                return
-            try:
-                await self._controller.stop_belt()
-            except BleakError as err:
-                _LOGGER.warning("Bluetooth error : %s", err)
-                self._connection_status = WalkingPadConnectionStatus.NOT_CONNECTED
-
-    async def set_speed(self, speed: float) -> None:
-        """Set the belt speed in km/h."""
-        if self._connection_status == WalkingPadConnectionStatus.NOT_CONNECTED:
-            await self.connect()
-        lock = self._begin_cmd()
-        async with lock:
-            if not self.connected:
-                return
-            try:
-                speed_tenths = int(speed * 10)
-                await self._controller.change_speed(speed_tenths)
-            except BleakError as err:
-                _LOGGER.warning("Bluetooth error : %s", err)
-                self._connection_status = WalkingPadConnectionStatus.NOT_CONNECTED
-
-    async def switch_mode(self, mode: WalkingPadMode) -> None:
-        """Switch the WalkingPad mode."""
-        if self._connection_status == WalkingPadConnectionStatus.NOT_CONNECTED:
-            await self.connect()
-        lock = self._begin_cmd()
-        async with lock:
-            if not self.connected:
-                return
-            try:
-                await self._controller.switch_mode(mode.value)
-            except BleakError as err:
-                _LOGGER.warning("Bluetooth error : %s", err)
-                self._connection_status = WalkingPadConnectionStatus.NOT_CONNECTED
+        if not self.connected:
+            # The connection manager is already reconnecting, don't wait for it.
+            return
+        # The status is transmitted to the status callbacks, not returned here.
+        await self._scheduler.submit(
+            CommandPriority.STATUS,
+            "ask_stats",
+            partial(self._run_command, "ask_stats", self._controller.ask_stats),
+            coalesce_key="ask_stats",
+        )
+
+    async def start_belt(self) -> bool:
+        """Start the belt.
+
+        A start request waiting for the link is replaced by a newer start or
+        stop request. A waiting stop request is never replaced: it is sent first,
+        then the start.
+        Return true once the WalkingPad reports the belt as starting or active.
+        """
+        sent = await self._send_command(
+            CommandPriority.CONTROL,
+            "start_belt",
+            self._controller.start_belt,
+            coalesce_key="start_belt",
+        )
+        return sent and await self._wait_for_status(
+            lambda status: status.belt_state in (BeltState.STARTING, BeltState.ACTIVE),
+            "belt",
+        )
+
+    async def stop_belt(self) -> bool:
+        """Stop the belt.
+
+        A start request waiting for the link is dropped, the stop is always sent.
+        Return true once the WalkingPad reports the belt as stopped.
+        """
+        sent = await self._send_command(
+            CommandPriority.STOP,
+            "stop_belt",
+            self._controller.stop_belt,
+            supersedes="start_belt",
+        )
+        return sent and await self._wait_for_status(
+            lambda status: status.belt_state in (BeltState.STOPPED, BeltState.STANDBY),
+            "belt",
+        )
+
+    async def set_speed(self, speed: float) -> bool:
+        """Set the belt speed in km/h.
+
+        Speed changes waiting for the link are merged, only the latest one is sent.
+        Return true once the WalkingPad reports the requested speed.
+        """
+        speed_tenths = int(speed * 10)
+        sent = await self._send_command(
+            CommandPriority.CONTROL,
+            "change_speed",
+            partial(self._controller.change_speed, speed_tenths),
+            coalesce_key="change_speed",
+        )
+        return sent and await self._wait_for_status(
+            lambda status: round(status.speed * 10) == speed_tenths, "speed"
+        )
+
+    async def switch_mode(self, mode: WalkingPadMode) -> bool:
+        """Switch the WalkingPad mode.
+
+        Return true once the WalkingPad reports the requested mode.
+        """
+        sent = await self._send_command(
+            CommandPriority.CONTROL,
+            "switch_mode",
+            partial(self._controller.switch_mode, mode.value),
+        )
+        return sent and await self._wait_for_status(lambda status: status.mode == mode)
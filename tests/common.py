@@ -0,0 +1,50 @@
+"""Helpers of the WalkingPad integration tests."""
+
+from __future__ import annotations
+
+import tempfile
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from bleak.backends.device import BLEDevice
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import frame
+
+from king_smith.const import BeltState, WalkingPadMode, WalkingPadStatus
+from king_smith.walkingpad import WalkingPad
+
+DEVICE_ADDRESS = "00:00:00:00:00:00"
+
+
+@asynccontextmanager
+async def async_test_home_assistant() -> AsyncIterator[HomeAssistant]:
+    """Run a Home Assistant instance with a temporary configuration directory."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        frame.async_setup(hass)
+        try:
+            yield hass
+        finally:
+            await hass.async_stop(force=True)
+
+
+def create_walkingpad(**kwargs) -> WalkingPad:
+    """Create a WalkingPad, not connected."""
+    return WalkingPad(
+        "WalkingPad test", BLEDevice(DEVICE_ADDRESS, "WalkingPad test", None), **kwargs
+    )
+
+
+def walkingpad_status(
+    belt_state: BeltState, timestamp: float, running_time: int = 0, speed: float = 0.0
+) -> WalkingPadStatus:
+    """Return a status reported by a WalkingPad walked at 1 m and 2 steps per second."""
+    return WalkingPadStatus(
+        belt_state=belt_state,
+        speed=speed,
+        mode=WalkingPadMode.MANUAL,
+        session_running_time=running_time,
+        session_distance=running_time,
+        session_steps=running_time * 2,
+        status_timestamp=timestamp,
+    )
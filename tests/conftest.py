@@ -0,0 +1,9 @@
+"""Test configuration of the WalkingPad integration."""
+
+import sys
+from pathlib import Path
+
+# Import the integration as the king_smith package, like Home Assistant does, and
+# the emulator of the benchmarks.
+ROOT = Path(__file__).parent.parent
+sys.path[:0] = [str(ROOT / "custom_components"), str(ROOT / "benchmarks")]
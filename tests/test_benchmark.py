@@ -0,0 +1,64 @@
+"""Short runs of the benchmarks, guarding against performance regressions.
+
+The bounds are an order of magnitude above the results on a development machine,
+so that a slow CI runner passes while a regression does not.
+"""
+
+import asyncio
+
+from benchmark import (
+    StatusPipeline,
+    _benchmark_allocations,
+    _benchmark_rate,
+    measure_commands,
+)
+
+from .common import async_test_home_assistant
+
+# Handling time of a status frame by the pipeline, in µs.
+MAX_FRAME_HANDLING_P95 = 2000
+# Memory kept per status frame, in bytes: the history is allocated once.
+MAX_RETAINED_PER_FRAME = 100
+# Round-trip of a command, with 20ms of emulated latency, in ms.
+MAX_COMMAND_ROUND_TRIP = 1000
+
+
+def test_status_pipeline() -> None:
+    """The status frames are handled fast, without retaining memory."""
+
+    async def run() -> None:
+        async with async_test_home_assistant() as hass:
+            pipeline = StatusPipeline(hass)
+            await pipeline.start()
+            try:
+                stats = await _benchmark_rate(pipeline, 100, 1)
+                _, retained = _benchmark_allocations(pipeline)
+            finally:
+                await pipeline.stop()
+
+        assert stats["frames"] == 100
+        assert stats["updates"] > 0
+        assert stats["p95"] < MAX_FRAME_HANDLING_P95
+        assert retained < MAX_RETAINED_PER_FRAME
+
+    asyncio.run(run())
+
+
+def test_command_round_trips() -> None:
+    """Each command is acknowledged by the emulated WalkingPad, and fast."""
+
+    async def run() -> None:
+        round_trips = await measure_commands(2, 0.02, 0.05)
+
+        assert set(round_trips) == {
+            "connect",
+            "ask_stats",
+            "start_belt",
+            "set_speed",
+            "stop_belt",
+        }
+        for name in ("ask_stats", "start_belt", "set_speed", "stop_belt"):
+            assert len(round_trips[name]) == 2
+            assert max(round_trips[name]) < MAX_COMMAND_ROUND_TRIP
+
+    asyncio.run(run())
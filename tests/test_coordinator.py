@@ -0,0 +1,50 @@
+"""Tests of the WalkingPad coordinator."""
+
+import asyncio
+from pathlib import Path
+
+from king_smith.const import BeltState
+from king_smith.coordinator import WalkingPadCoordinator
+from king_smith.session import WalkingPadSessionRecorder, read_last_sessions
+
+from .common import async_test_home_assistant, create_walkingpad, walkingpad_status
+
+
+def test_status_listener_sees_stop_expected_by_command(tmp_path: Path) -> None:
+    """A stop already displayed as the effect of a command closes the session."""
+
+    async def run() -> None:
+        async with async_test_home_assistant() as hass:
+            coordinator = WalkingPadCoordinator(hass, create_walkingpad())
+            path = tmp_path / "sessions.kssess"
+            recorder = WalkingPadSessionRecorder(hass, coordinator, path)
+            recorder.async_start()
+            for second in range(1, 4):
+                coordinator._async_handle_update(
+                    walkingpad_status(BeltState.ACTIVE, second, second, 3.0)
+                )
+
+            stopped = asyncio.get_running_loop().create_future()
+
+            async def stop_belt() -> bool:
+                return await stopped
+
+            command = asyncio.ensure_future(
+                coordinator.async_run_command(
+                    stop_belt(), belt_state=BeltState.STOPPED, speed=0.0
+                )
+            )
+            await asyncio.sleep(0)
+            assert coordinator.status.belt_state == BeltState.STOPPED
+            coordinator._async_handle_update(walkingpad_status(BeltState.STOPPED, 4, 3))
+            stopped.set_result(True)
+            assert await command
+
+            assert recorder._session is None
+            await recorder.async_stop()
+            sessions = await hass.async_add_executor_job(read_last_sessions, path, 2)
+            assert len(sessions) == 1
+            assert sessions[0].samples == 4
+            assert sessions[0].distance == 2
+
+    asyncio.run(run())
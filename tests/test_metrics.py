@@ -0,0 +1,20 @@
+"""Tests of the link metrics."""
+
+from king_smith.metrics import LatencyHistogram
+
+
+def test_percentiles_computed_once_per_record() -> None:
+    """The percentiles are computed again only once a duration is recorded."""
+    histogram = LatencyHistogram()
+    assert histogram.percentiles_ms() == {"p50": None, "p95": None, "p99": None}
+
+    histogram.record(0.001)
+    percentiles = histogram.percentiles_ms()
+    assert percentiles == {"p50": 1.0, "p95": 1.0, "p99": 1.0}
+    percentiles["p50"] = 0
+    assert histogram.percentiles_ms()["p50"] == 1.0
+    assert histogram._percentiles_ms is not None
+
+    for _ in range(99):
+        histogram.record(0.002)
+    assert histogram.percentiles_ms()["p50"] == 2.0
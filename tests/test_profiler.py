@@ -0,0 +1,53 @@
+"""Tests of the hot path profiler."""
+
+import asyncio
+from functools import partial
+from pathlib import Path
+
+from emulator import WalkingPadEmulator
+
+from king_smith.coordinator import WalkingPadCoordinator
+from king_smith.profiler import HotPathProfiler
+from king_smith.session import WalkingPadSessionRecorder
+
+from .common import async_test_home_assistant, create_walkingpad
+
+
+def test_profile_listeners_and_ble_calls(tmp_path: Path) -> None:
+    """The listeners added while profiling are timed, nested calls are not."""
+
+    async def run() -> dict[str, dict[str, float]]:
+        async with async_test_home_assistant() as hass:
+            device = create_walkingpad(
+                controller_factory=partial(
+                    WalkingPadEmulator, start_delay=0, acceleration=1000
+                )
+            )
+            coordinator = WalkingPadCoordinator(hass, device)
+            await device.connect()
+            profiler = HotPathProfiler()
+            profiler.start([(device, coordinator)])
+            try:
+                recorder = WalkingPadSessionRecorder(
+                    hass, coordinator, tmp_path / "sessions.kssess"
+                )
+                recorder.async_start()
+                coordinator.async_add_listener(lambda: None)
+                assert await device.start_belt()
+                assert await device.stop_belt()
+                await recorder.async_stop()
+            finally:
+                profiler.stop()
+                await device.disconnect()
+                device.shutdown()
+            assert coordinator.listener_profiler is None
+        return profiler.summary()
+
+    summary = asyncio.run(run())
+
+    assert summary["entity_state_write"]["calls"] > 0
+    assert summary["status_SessionRecorder"]["calls"] > 0
+    assert summary["ble_start_belt"]["calls"] == 1
+    assert summary["ble_stop_belt"]["calls"] == 1
+    # The speed change sending the stop is part of the stop_belt call.
+    assert summary["ble_change_speed"]["calls"] == 0
@@ -0,0 +1,49 @@
+"""Tests of the walking session recorder."""
+
+import asyncio
+from pathlib import Path
+from unittest.mock import patch
+
+from king_smith.const import BeltState
+from king_smith.coordinator import WalkingPadCoordinator
+from king_smith.session import (
+    WalkingPadSessionFile,
+    WalkingPadSessionRecorder,
+    read_last_sessions,
+)
+
+from .common import async_test_home_assistant, create_walkingpad, walkingpad_status
+
+
+def test_sessions_stay_ordered_after_restart(tmp_path: Path) -> None:
+    """A session recorded after a restart and a clock step back follows the others."""
+    path = tmp_path / "sessions.kssess"
+
+    async def record_session(clock: float) -> None:
+        async with async_test_home_assistant() as hass:
+            coordinator = WalkingPadCoordinator(hass, create_walkingpad())
+            recorder = WalkingPadSessionRecorder(hass, coordinator, path)
+            await recorder.async_load()
+            recorder.async_start()
+            with patch("king_smith.session.time.time", return_value=clock):
+                coordinator._async_handle_update(
+                    walkingpad_status(BeltState.ACTIVE, 1, 1, 3.0)
+                )
+            coordinator._async_handle_update(walkingpad_status(BeltState.STOPPED, 2, 2))
+            await recorder.async_stop()
+
+    asyncio.run(record_session(2_000_000_000))
+    asyncio.run(record_session(1_000_000_000))
+
+    with WalkingPadSessionFile(path) as session_file:
+        assert session_file.last_session() == 2_000_000_001
+        assert len(session_file.samples(2_000_000_000)) == 2
+        assert len(session_file.samples(2_000_000_001)) == 2
+
+
+def test_read_last_sessions_of_invalid_file(tmp_path: Path) -> None:
+    """A file which is not a session file has no sessions."""
+    path = tmp_path / "sessions.kssess"
+    path.write_bytes(b"KSW")
+
+    assert read_last_sessions(path, 5) == []
@@ -0,0 +1,42 @@
+"""Tests of the statistics import."""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+from king_smith.const import BeltState
+from king_smith.coordinator import WalkingPadCoordinator
+from king_smith.statistics import WalkingPadStatisticsImporter
+
+from .common import async_test_home_assistant, create_walkingpad, walkingpad_status
+
+
+def test_session_end_imports_statistics() -> None:
+    """A stop already displayed as the effect of a command imports the session."""
+
+    async def run() -> None:
+        async with async_test_home_assistant() as hass:
+            coordinator = WalkingPadCoordinator(hass, create_walkingpad())
+            importer = WalkingPadStatisticsImporter(hass, coordinator, "WalkingPad")
+            importer.async_start()
+            for second in range(1, 4):
+                coordinator._async_handle_update(
+                    walkingpad_status(BeltState.ACTIVE, second, second, 3.0)
+                )
+
+            with patch.object(importer, "async_import", AsyncMock()) as async_import:
+                await coordinator.async_run_command(
+                    _reported(coordinator, walkingpad_status(BeltState.STOPPED, 4, 3)),
+                    belt_state=BeltState.STOPPED,
+                    speed=0.0,
+                )
+                await hass.async_block_till_done()
+                async_import.assert_awaited_once()
+                await importer.async_stop()
+
+    asyncio.run(run())
+
+
+async def _reported(coordinator: WalkingPadCoordinator, status) -> bool:
+    """Report a status while the expected effect of the command is displayed."""
+    coordinator._async_handle_update(status)
+    return True